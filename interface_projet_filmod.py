@@ -1,18 +1,138 @@
 # -*- coding: utf-8 -*-
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-import matplotlib
-import matplotlib.pyplot as plt
 import random
 from datetime import datetime, timedelta
 import io
-import base64
+import copy
+import csv
+import shutil
+import importlib
+import time
+import itertools
+import os
+import hashlib
+import html
+import math
+import json
+import sqlite3
+import threading
+import multiprocessing
+import bisect
+import sys
+import cProfile
+import pstats
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, wraps
+from contextlib import contextmanager
 
-from flask import Flask, render_template_string, request
+from flask import Blueprint, Flask, Response, abort, current_app, g, jsonify, render_template_string, request, url_for
 
-# Force Matplotlib à ne pas utiliser de backend d'interface graphique
-matplotlib.use('Agg')
+# --- NOUVEAU : Imports différés des bibliothèques lourdes ---
+class ModuleDiffere:
+    """Module importé au premier accès à l'un de ses attributs, puis substitué dans les globales.
+
+    Importer ce fichier ne charge ni pandas, ni scikit-learn, ni Matplotlib : ils ne le sont
+    qu'au chargement des données, à l'entraînement ou au premier rendu d'un graphique.
+    """
+
+    def __init__(self, alias, importer):
+        self._alias = alias
+        self._importer = importer
+
+    def __getattr__(self, attribut):
+        module = self._importer()
+        globals()[self._alias] = module
+        return getattr(module, attribut)
+
+def importer_pyplot():
+    import matplotlib
+    # Force Matplotlib à ne pas utiliser de backend d'interface graphique
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as pyplot
+    return pyplot
+
+pd = ModuleDiffere('pd', partial(importlib.import_module, 'pandas'))
+np = ModuleDiffere('np', partial(importlib.import_module, 'numpy'))
+joblib = ModuleDiffere('joblib', partial(importlib.import_module, 'joblib'))
+sklearn = ModuleDiffere('sklearn', partial(importlib.import_module, 'sklearn'))
+plt = ModuleDiffere('plt', importer_pyplot)
+
+# --- 0. CONFIGURATION (surchargeable par variables d'environnement) ---
+CONFIG = {
+    # Nombre maximal de graphiques rendus conservés en mémoire (éviction LRU)
+    'CACHE_GRAPHIQUES_TAILLE': int(os.environ.get('RH_CACHE_GRAPHIQUES_TAILLE', 64)),
+    # Nombre maximal de sélections dont les agrégats sont conservés en mémoire
+    'CACHE_AGREGATS_TAILLE': int(os.environ.get('RH_CACHE_AGREGATS_TAILLE', 256)),
+    # Moteur de rendu des graphiques : 'matplotlib' ou 'svg' (natif, SVG uniquement ; Matplotlib en repli)
+    'GRAPHIQUES_MOTEUR': os.environ.get('RH_GRAPHIQUES_MOTEUR', 'matplotlib'),
+    # Format des graphiques servis par /plot/<nom> ('png' ou 'svg' ; vide : 'svg' avec le moteur natif, sinon 'png')
+    'PLOT_FORMAT': os.environ.get('RH_PLOT_FORMAT', ''),
+    # Durées de cache navigateur (secondes) ; le graphique des influenceurs est versionné dans son URL
+    'PLOT_MAX_AGE': int(os.environ.get('RH_PLOT_MAX_AGE', 300)),
+    'PLOT_MAX_AGE_INFLUENCEURS': int(os.environ.get('RH_PLOT_MAX_AGE_INFLUENCEURS', 86400)),
+    # Horizon de prévision maximal (jours), pré-calculé une fois par modèle
+    'HORIZON_MAX': int(os.environ.get('RH_HORIZON_MAX', 90)),
+    # Modèles par segment : 'aucun', 'categorie', 'ligne' ou 'les_deux'
+    'SEGMENTS_MODE': os.environ.get('RH_SEGMENTS_MODE', 'aucun'),
+    'SEGMENTS_PROCESSUS': int(os.environ.get('RH_SEGMENTS_PROCESSUS', 2)),
+    'SEGMENTS_MAX': int(os.environ.get('RH_SEGMENTS_MAX', 32)),
+    'SEGMENTS_MEMOIRE_MO': int(os.environ.get('RH_SEGMENTS_MEMOIRE_MO', 256)),
+    # Nombre minimal de jours distincts pour entraîner un segment
+    'SEGMENTS_MIN_JOURS': int(os.environ.get('RH_SEGMENTS_MIN_JOURS', 14)),
+    # Nombre de segments pré-entraînés après chaque (ré)entraînement (0 = aucun)
+    'SEGMENTS_PRECHAUFFAGE': int(os.environ.get('RH_SEGMENTS_PRECHAUFFAGE', 0)),
+    # Dossier des artefacts du modèle (vide = désactivé) et nombre d'artefacts conservés
+    'ARTEFACTS_DIR': os.environ.get('RH_ARTEFACTS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.artefacts')),
+    'ARTEFACTS_MAX': int(os.environ.get('RH_ARTEFACTS_MAX', 5)),
+    # Ingestion : arbres ajoutés par lot (warm start) et taille maximale avant ré-entraînement complet
+    'INGESTION_ARBRES': int(os.environ.get('RH_INGESTION_ARBRES', 20)),
+    'INGESTION_ARBRES_MAX': int(os.environ.get('RH_INGESTION_ARBRES_MAX', 300)),
+    # Ré-entraînement en arrière-plan : intervalle en secondes (0 = uniquement sur demande)
+    'REENTRAINEMENT_INTERVALLE': int(os.environ.get('RH_REENTRAINEMENT_INTERVALLE', 0)),
+    # Profilage : '?_profile=1' autorisé, 1 requête sur N profilée (0 = jamais), période d'échantillonnage des piles
+    'PROFILAGE_PARAMETRE': os.environ.get('RH_PROFILAGE_PARAMETRE', '0') == '1',
+    'PROFILAGE_ECHANTILLON': int(os.environ.get('RH_PROFILAGE_ECHANTILLON', 0)),
+    'PROFILAGE_INTERVALLE_MS': float(os.environ.get('RH_PROFILAGE_INTERVALLE_MS', 1)),
+    # Dossier des rapports de profilage et nombre de rapports conservés (tampon circulaire)
+    'PROFILAGE_DIR': os.environ.get('RH_PROFILAGE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.profils')),
+    'PROFILAGE_MAX': int(os.environ.get('RH_PROFILAGE_MAX', 20)),
+    # Préparation des données et du modèle : 'arriere_plan' (thread, /readyz), 'immediate' ou 'paresseuse' (1re requête)
+    'PREPARATION': os.environ.get('RH_PREPARATION', 'arriere_plan'),
+    # Mode multi-workers : dossier de l'instantané partagé (données .npy projetées + artefact du modèle ; vide = désactivé)
+    'PARTAGE_DIR': os.environ.get('RH_PARTAGE_DIR', ''),
+    # Exports réels 'Categorie=chemin.csv;Categorie=chemin.xlsx' (vide = données fictives), lus par blocs
+    'EXPORTS': os.environ.get('RH_EXPORTS', ''),
+    'EXPORTS_TAILLE_BLOC': int(os.environ.get('RH_EXPORTS_TAILLE_BLOC', 100_000)),
+    # Cache Parquet des exports dépivotés, partitionné par Categorie / mois
+    'EXPORTS_CACHE_DIR': os.environ.get('RH_EXPORTS_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache_exports')),
+    # Agrégation journalière de DF_COMPLET par blocs de N évaluations (0 = en une passe) : copies temporaires bornées
+    'AGREGATION_TAILLE_BLOC': int(os.environ.get('RH_AGREGATION_TAILLE_BLOC', 0)),
+    # NOUVEAU : prévision par la forêt aplatie en tableaux NumPy (0 = model.predict de scikit-learn)
+    'INFERENCE_COMPACTE': os.environ.get('RH_INFERENCE_COMPACTE', '1') == '1',
+    # NOUVEAU : fichier SQLite des évaluations, partagé par les workers (vide : DF_COMPLET en mémoire)
+    'SQLITE': os.environ.get('RH_SQLITE', ''),
+    # NOUVEAU : modèle global par collaborateur (classement prévu) en plus du modèle journalier
+    'PANEL': os.environ.get('RH_PANEL', '0') == '1',
+    # NOUVEAU : cœurs utilisés par l'entraînement des forêts (borné : -1 prendrait tous les cœurs de chaque worker)
+    'N_JOBS': int(os.environ.get('RH_N_JOBS', 1)),
+    # NOUVEAU : retards et moyennes/volatilités glissantes (7 et 28 jours) de la note en features
+    'FEATURES_DECALEES': os.environ.get('RH_FEATURES_DECALEES', '0') == '1',
+    # NOUVEAU : intervalle de prévision par date (quantiles des arbres) ou global (± 1,96 x erreur OOB)
+    'INTERVALLE_MODE': os.environ.get('RH_INTERVALLE_MODE', 'arbres'),  # 'arbres' ou 'global'
+    'INTERVALLE_NIVEAU': float(os.environ.get('RH_INTERVALLE_NIVEAU', 0.95)),
+    # Backtest (--backtest) : nombre de plis, horizon (jours), processus et grille JSON (vide = grille par défaut)
+    'BACKTEST_PLIS': int(os.environ.get('RH_BACKTEST_PLIS', 5)),
+    'BACKTEST_HORIZON': int(os.environ.get('RH_BACKTEST_HORIZON', 14)),
+    'BACKTEST_PROCESSUS': int(os.environ.get('RH_BACKTEST_PROCESSUS', os.cpu_count() or 1)),
+    'BACKTEST_GRILLE': json.loads(os.environ['RH_BACKTEST_GRILLE']) if os.environ.get('RH_BACKTEST_GRILLE') else None,
+    # Génération des données fictives : 'classique' (ligne à ligne) ou 'vectorise' (NumPy)
+    'DONNEES_MODE': os.environ.get('RH_DONNEES_MODE', 'classique'),
+    'DONNEES_NB_EVALS': int(os.environ.get('RH_DONNEES_NB_EVALS', 150)),
+    # Graine aléatoire (vide = non reproductible)
+    'DONNEES_GRAINE': int(os.environ['RH_DONNEES_GRAINE']) if os.environ.get('RH_DONNEES_GRAINE') else None,
+    # Stockage compact de DF_COMPLET (catégories, notes float32/int8, dates en int32)
+    'DONNEES_COMPACTES': os.environ.get('RH_DONNEES_COMPACTES', '0') == '1',
+}
 
 # --- 1. LE TEMPLATE HTML/CSS/JINJA2 (Frontend Amélioré) ---
 HTML_TEMPLATE = """
@@ -22,6 +142,7 @@ HTML_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Prévision RH</title>
+    {% if statut_segment == 'en_cours' %}<meta http-equiv="refresh" content="5">{% endif %}
     <style>
         :root {
             --bg-color: #f0f2f6;
@@ -240,6 +361,15 @@ HTML_TEMPLATE = """
                 </div>
             </div>
             
+            <!-- NOUVEAU FILTRE PAR PÉRIODE -->
+            <div class="form-group">
+                <label class="group-label">Période :</label>
+                <div class="checkbox-group">
+                    <label>Du <input type="date" name="date_debut" min="{{ date_min }}" max="{{ date_max }}" value="{{ periode.date_debut }}"></label>
+                    <label>Au <input type="date" name="date_fin" min="{{ date_min }}" max="{{ date_max }}" value="{{ periode.date_fin }}"></label>
+                </div>
+            </div>
+            
             <button type="submit">Actualiser</button>
         </form>
     </aside>
@@ -247,6 +377,19 @@ HTML_TEMPLATE = """
     <main>
         <h2>📈 Prévision à {{ jours_a_predire }} jours</h2>
         
+        <!-- NOUVEAU : ÉTAT DU MODÈLE DE SEGMENT -->
+        {% if statut_segment %}
+        <div class="card" style="border-left: 4px solid var(--primary-color);">
+            {% if statut_segment == 'pret' %}
+                🎯 Prévision issue du modèle spécifique au segment sélectionné.
+            {% elif statut_segment == 'en_cours' %}
+                ⏳ Le modèle de ce segment est en cours d'entraînement : la prévision affichée est celle du modèle global (actualisation automatique).
+            {% else %}
+                ℹ️ Données insuffisantes pour un modèle spécifique à ce segment : prévision du modèle global.
+            {% endif %}
+        </div>
+        {% endif %}
+        
         <div class="card metric-grid">
             <div class="metric-card">
                 <h4><span style="font-size: 1.5rem;">📊</span>Note Actuelle Moy.</h4>
@@ -264,7 +407,7 @@ HTML_TEMPLATE = """
         
         <div class="card plot-container">
             <h3>Graphique de la prévision (Modèle RandomForest)</h3>
-            <img src="data:image/png;base64,{{ plot_base64 }}" alt="Graphique de prévision">
+            <img src="{{ plot_url }}" alt="Graphique de prévision">
         </div>
         
         <!-- NOUVELLE SECTION : KEY INFLUENCERS -->
@@ -275,8 +418,8 @@ HTML_TEMPLATE = """
                 Ce graphique montre l'importance de chaque facteur pour le modèle de prédiction. 
                 Un score élevé signifie que le facteur a plus d'influence sur la note finale.
             </p>
-            {% if plot_influencers_base64 %}
-                <img src="data:image/png;base64,{{ plot_influencers_base64 }}" alt="Graphique des facteurs clés">
+            {% if plot_influencers_url %}
+                <img src="{{ plot_influencers_url }}" alt="Graphique des facteurs clés">
             {% else %}
                 <p style="color: var(--text-color-light);">Erreur lors de la génération du graphique des facteurs clés.</p>
             {% endif %}
@@ -288,8 +431,8 @@ HTML_TEMPLATE = """
             <!-- NOUVEAU GRAPHIQUE PAR SECTEUR -->
             <div class="card plot-container">
                 <h3>📊 Moyenne par Secteur</h3>
-                {% if plot_cat_base64 %}
-                    <img src="data:image/png;base64,{{ plot_cat_base64 }}" alt="Graphique par Secteur">
+                {% if plot_cat_url %}
+                    <img src="{{ plot_cat_url }}" alt="Graphique par Secteur">
                 {% else %}
                     <p style="color: var(--text-color-light);">Aucune donnée à afficher pour ces filtres.</p>
                 {% endif %}
@@ -298,8 +441,8 @@ HTML_TEMPLATE = """
             <!-- NOUVEAU GRAPHIQUE PAR LIGNE -->
             <div class="card plot-container">
                 <h3>📈 Moyenne par Ligne</h3>
-                {% if plot_ligne_base64 %}
-                    <img src="data:image/png;base64,{{ plot_ligne_base64 }}" alt="Graphique par Ligne">
+                {% if plot_ligne_url %}
+                    <img src="{{ plot_ligne_url }}" alt="Graphique par Ligne">
                 {% else %}
                     <p style="color: var(--text-color-light);">Aucune donnée à afficher pour ces filtres.</p>
                 {% endif %}
@@ -380,6 +523,30 @@ HTML_TEMPLATE = """
                 {% endif %}
             </div>
         </div>
+
+        <!-- NOUVEAU : Classement prévu (modèle panel par collaborateur) -->
+        {% if top_5_prevu %}
+        <div class="data-grid">
+            {% for titre, lignes_prevues in [("🔮 Top 5 prévu", top_5_prevu), ("🔮 À surveiller (prévision)", bottom_5_prevu)] %}
+            <div class="card">
+                <h3>{{ titre }} <small>(moyenne J+1 à J+{{ jours_a_predire }})</small></h3>
+                <table>
+                    <thead>
+                        <tr><th>Collaborateur</th><th>Note prévue</th></tr>
+                    </thead>
+                    <tbody>
+                        {% for row in lignes_prevues %}
+                        <tr>
+                            <td>{{ row.Collaborateur }}</td>
+                            <td>{{ "%.2f"|format(row.Note) }}</td>
+                        </tr>
+                        {% endfor %}
+                    </tbody>
+                </table>
+            </div>
+            {% endfor %}
+        </div>
+        {% endif %}
         
     </main>
 </body>
@@ -388,8 +555,26 @@ HTML_TEMPLATE = """
 
 
 # --- 2. LOGIQUE DE GÉNÉRATION DES DONNÉES (Identique) ---
-def charger_et_nettoyer_donnees():
-    """Génère, nettoie, et fusionne les données fictives."""
+def nettoyer_et_depivoter(df_brut, id_cols, categorie):
+    """Passe un formulaire (une colonne par compétence) au format long : une ligne par note."""
+    df_melted = df_brut.melt(
+        id_vars=id_cols,
+        var_name="Compétence",
+        value_name="Note"
+    )
+    df_melted['Categorie'] = categorie
+    return df_melted
+
+def charger_et_nettoyer_donnees(nb_evals=None, mode=None, graine=None):
+    """Génère, nettoie, et fusionne les données fictives.
+
+    `mode` vaut 'classique' (génération ligne à ligne puis melt/concat) ou
+    'vectorise' (tirages NumPy produisant directement le format long).
+    Les valeurs par défaut viennent de CONFIG ; une même `graine` donne les mêmes données.
+    """
+    nb_evals = CONFIG['DONNEES_NB_EVALS'] if nb_evals is None else nb_evals
+    mode = mode or CONFIG['DONNEES_MODE']
+    graine = CONFIG['DONNEES_GRAINE'] if graine is None else graine
     
     COLLABORATEURS = [
         'Adil', 'Anouar', 'Badr', 'Bahia', 'Fatima', 'Hassan', 'Hicham', 'Houda', 
@@ -431,41 +616,52 @@ def charger_et_nettoyer_donnees():
         'Article', 'Polyvalence', 'Collaborateur'
     ]
 
+    CATEGORIES = [
+        ("Maintenance", COMPETENCES_MAINTENANCE),
+        ("Production", COMPETENCES_PRODUCTION),
+        ("Qualité", COMPETENCES_QUALITE),
+        ("Méthode", COMPETENCES_METHODE),
+    ]
+
+    if mode == 'vectorise':
+        return generer_donnees_vectorisees(CATEGORIES, ID_COLS, dates_continues, {
+            'Ligne designer': LIGNES,
+            'Etat du personnel': ETATS,
+            'Article': ARTICLES,
+            'Polyvalence': ['1 taches', '2 taches', '3 taches'],
+            'Collaborateur': COLLABORATEURS,
+        }, nb_evals, graine)
+    if mode != 'classique':
+        raise ValueError(f"Mode de génération inconnu : {mode!r} (attendu 'classique' ou 'vectorise')")
+
+    rng = random.Random(graine)
+
     def generer_donnees_brutes(categorie, liste_competences, nb_evals=150):
         donnees = []
         for _ in range(nb_evals):
             ligne = {
-                'Sélectionnez la date de l\'évaluation.': random.choice(DATES_EVAL),
-                'Ligne designer': random.choice(LIGNES),
-                'Etat du personnel': random.choice(ETATS),
-                'Article': random.choice(ARTICLES),
-                'Collaborateur': random.choice(COLLABORATEURS),
-                'Polyvalence': f"{random.randint(1,3)} taches"
+                'Sélectionnez la date de l\'évaluation.': rng.choice(DATES_EVAL),
+                'Ligne designer': rng.choice(LIGNES),
+                'Etat du personnel': rng.choice(ETATS),
+                'Article': rng.choice(ARTICLES),
+                'Collaborateur': rng.choice(COLLABORATEURS),
+                'Polyvalence': f"{rng.randint(1,3)} taches"
             }
             for comp in liste_competences:
-                note_base = random.randint(1, 5)
+                note_base = rng.randint(1, 5)
                 jour_semaine = ligne['Sélectionnez la date de l\'évaluation.'].weekday()
                 if jour_semaine >= 5: # Weekend
-                    note_base = max(1, note_base - random.uniform(0, 1))
+                    note_base = max(1, note_base - rng.uniform(0, 1))
                 ligne[comp] = note_base
             donnees.append(ligne)
             
         df = pd.DataFrame(donnees)
         return df, categorie
 
-    df_maint_brut, cat_maint = generer_donnees_brutes("Maintenance", COMPETENCES_MAINTENANCE)
-    df_prod_brut, cat_prod = generer_donnees_brutes("Production", COMPETENCES_PRODUCTION)
-    df_qual_brut, cat_qual = generer_donnees_brutes("Qualité", COMPETENCES_QUALITE)
-    df_meth_brut, cat_meth = generer_donnees_brutes("Méthode", COMPETENCES_METHODE)
-
-    def nettoyer_et_depivoter(df_brut, id_cols, categorie):
-        df_melted = df_brut.melt(
-            id_vars=id_cols,
-            var_name="Compétence",
-            value_name="Note"
-        )
-        df_melted['Categorie'] = categorie
-        return df_melted
+    df_maint_brut, cat_maint = generer_donnees_brutes("Maintenance", COMPETENCES_MAINTENANCE, nb_evals)
+    df_prod_brut, cat_prod = generer_donnees_brutes("Production", COMPETENCES_PRODUCTION, nb_evals)
+    df_qual_brut, cat_qual = generer_donnees_brutes("Qualité", COMPETENCES_QUALITE, nb_evals)
+    df_meth_brut, cat_meth = generer_donnees_brutes("Méthode", COMPETENCES_METHODE, nb_evals)
 
     df_maint_propre = nettoyer_et_depivoter(df_maint_brut, ID_COLS, cat_maint)
     df_prod_propre = nettoyer_et_depivoter(df_prod_brut, ID_COLS, cat_prod)
@@ -479,36 +675,804 @@ def charger_et_nettoyer_donnees():
     
     return df_complet
 
+# --- NOUVEAU : Génération vectorisée (NumPy) pour les tests de charge ---
+def generer_donnees_vectorisees(categories, id_cols, dates, modalites, nb_evals, graine=None):
+    """Génère directement le format long, colonne par colonne, avec un `numpy.random.Generator`.
+
+    Même schéma et même ordre de lignes que `melt` + `concat` du mode classique
+    (pour chaque catégorie, les évaluations sont répétées compétence par compétence),
+    mais les dimensions sont des `Categorical` construits depuis leurs codes :
+    aucun objet Python n'est créé par ligne, ce qui tient 10^6+ évaluations en mémoire.
+    """
+    rng = np.random.default_rng(graine)
+    colonne_date = id_cols[0]
+    valeurs_dates = dates.to_numpy()
+    est_weekend = dates.dayofweek.to_numpy() >= 5
+    toutes_competences = list(dict.fromkeys(comp for _, comps in categories for comp in comps))
+
+    morceaux = {col: [] for col in id_cols + ['Compétence', 'Note', 'Categorie']}
+    for code_categorie, (categorie, liste_competences) in enumerate(categories):
+        nb_comp = len(liste_competences)
+        idx_dates = rng.integers(0, len(valeurs_dates), nb_evals)
+        morceaux[colonne_date].append(np.tile(valeurs_dates[idx_dates], nb_comp))
+        for col in id_cols[1:]:
+            codes = rng.integers(0, len(modalites[col]), nb_evals, dtype=np.int8)
+            morceaux[col].append(np.tile(codes, nb_comp))
+
+        # Notes (compétences x évaluations) avec la pénalité du weekend
+        notes = rng.integers(1, 6, size=(nb_comp, nb_evals)).astype(np.float64)
+        penalite = rng.uniform(0, 1, size=(nb_comp, nb_evals))
+        notes = np.where(est_weekend[idx_dates], np.maximum(1, notes - penalite), notes)
+        morceaux['Note'].append(notes.ravel())
+        codes_comp = np.array([toutes_competences.index(comp) for comp in liste_competences], dtype=np.int8)
+        morceaux['Compétence'].append(np.repeat(codes_comp, nb_evals))
+        morceaux['Categorie'].append(np.full(nb_comp * nb_evals, code_categorie, dtype=np.int8))
+
+    modalites = dict(modalites, **{
+        'Compétence': toutes_competences,
+        'Categorie': [categorie for categorie, _ in categories],
+    })
+    colonnes = {}
+    for col, valeurs in morceaux.items():
+        valeurs = np.concatenate(valeurs)
+        if col in modalites:
+            valeurs = pd.Categorical.from_codes(valeurs, categories=modalites[col])
+        colonnes[col] = valeurs
+    return pd.DataFrame(colonnes)
+
+# --- NOUVEAU : Représentation compacte de DF_COMPLET ---
+COLONNES_DIMENSIONS = [
+    'Ligne designer', 'Etat du personnel', 'Article', 'Polyvalence',
+    'Collaborateur', 'Compétence', 'Categorie'
+]
+
+def compacter_donnees(df_complet):
+    """Renvoie une copie compacte de DF_COMPLET.
+
+    Dimensions en `category`, notes en `int8` (si toutes entières) sinon `float32`,
+    dates en décalage `int32` (jours) depuis une origine stockée dans `df.attrs['origine_dates']`.
+    """
+    colonne_date = "Sélectionnez la date de l'évaluation."
+    df = df_complet.copy()
+    for col in COLONNES_DIMENSIONS:
+        if df[col].dtype != 'category':
+            df[col] = df[col].astype('category')
+
+    notes = pd.to_numeric(df['Note'], errors='coerce')
+    if notes.notna().all() and (notes % 1 == 0).all() and notes.between(-128, 127).all():
+        df['Note'] = notes.astype(np.int8)
+    else:
+        df['Note'] = notes.astype(np.float32)
+
+    dates = pd.to_datetime(df[colonne_date], errors='coerce')
+    if dates.notna().all() and not dates.empty:
+        origine = dates.min().normalize()
+        df[colonne_date] = (dates - origine).dt.days.astype(np.int32)
+        df.attrs['origine_dates'] = origine
+    return df
+
+def dates_evaluation(df):
+    """Renvoie la colonne des dates d'évaluation en datetime, que DF_COMPLET soit compacté ou non."""
+    colonne_date = "Sélectionnez la date de l'évaluation."
+    dates = df[colonne_date]
+    if pd.api.types.is_integer_dtype(dates):
+        return df.attrs['origine_dates'] + pd.to_timedelta(dates, unit='D')
+    return pd.to_datetime(dates, errors='coerce')
+
+def dates_au_jour(valeurs, **options):
+    """Convertit des dates lues (texte ou datetime) en jours : sans heure ni fuseau, illisibles en NaT.
+
+    Une date avec fuseau est ramenée en UTC puis rendue naïve, pour se comparer aux autres ;
+    l'heure est retirée pour qu'un même jour ne donne qu'une ligne d'agrégat. `options` est
+    transmis à `pd.to_datetime` (ex. `dayfirst=True` pour les exports).
+    """
+    dates = pd.to_datetime(valeurs, errors='coerce', utc=True, **options)
+    return dates.dt.tz_convert(None).dt.normalize()
+
+# --- NOUVEAU : Évaluations triées par date, découpées par recherche dichotomique ---
+def trier_par_date(df):
+    """Renvoie `df` trié (tri stable) par date d'évaluation ; tel quel s'il l'est déjà."""
+    colonne_date = "Sélectionnez la date de l'évaluation."
+    if df[colonne_date].is_monotonic_increasing:
+        return df
+    df_trie = df.sort_values(colonne_date, kind='stable', ignore_index=True)
+    df_trie.attrs = dict(df.attrs)
+    return df_trie
+
+def tranche_periode(df, debut=None, fin=None):
+    """Tranche `[i, j)` des lignes de `df` (trié par date) datées de `debut` à `fin` inclus.
+
+    Deux `searchsorted` sur la colonne des dates, sans la convertir : pour un DF_COMPLET
+    compacté, ce sont les bornes qui sont exprimées en jours depuis `origine_dates`.
+    """
+    colonne_date = "Sélectionnez la date de l'évaluation."
+    dates = df[colonne_date].to_numpy()
+    def position(borne):
+        if pd.api.types.is_integer_dtype(dates):
+            return np.searchsorted(dates, (borne - df.attrs['origine_dates']).days, side='left')
+        return np.searchsorted(dates, np.datetime64(borne, 'ns'), side='left')
+    i = 0 if debut is None else position(debut)
+    # `fin` est incluse : on s'arrête avant le premier instant du lendemain
+    j = len(dates) if fin is None else position(fin + timedelta(days=1))
+    return slice(i, max(i, j))
+
+def rapport_memoire(df_avant, df_apres):
+    """Compare l'occupation mémoire (octets, par colonne) de deux représentations."""
+    rapport = pd.DataFrame({
+        'avant': df_avant.memory_usage(deep=True, index=False),
+        'apres': df_apres.memory_usage(deep=True, index=False),
+    })
+    rapport.loc['TOTAL'] = rapport.sum()
+    rapport['ratio'] = (rapport['apres'] / rapport['avant']).round(3)
+    return rapport
+
+# --- NOUVEAU : Exports réels (CSV / Excel) lus par blocs, avec cache Parquet ---
+# Colonnes d'identification des formulaires d'évaluation ; toute autre colonne est une compétence
+COLONNES_IDENTIFIANTS = [
+    "Sélectionnez la date de l'évaluation.", 'Ligne designer', 'Etat du personnel',
+    'Article', 'Polyvalence', 'Collaborateur'
+]
+# Colonnes ajoutées par les outils de formulaire, qui ne sont pas des compétences
+COLONNES_IGNOREES_EXPORT = {'Horodateur', 'Horodatage', 'Timestamp', 'Adresse e-mail', 'Email Address'}
+VERSION_FORMAT_CACHE_EXPORTS = 3
+
+def sources_exports(specification):
+    """Analyse 'Categorie=chemin;Categorie=chemin' en une liste `[(categorie, chemin), ...]`."""
+    sources = []
+    for element in filter(None, (morceau.strip() for morceau in specification.split(';'))):
+        categorie, separateur, chemin = element.partition('=')
+        if not separateur or not categorie.strip() or not chemin.strip():
+            raise ValueError(f"Source d'export invalide : {element!r} (attendu 'Categorie=chemin')")
+        sources.append((categorie.strip(), chemin.strip()))
+    return sources
+
+def signature_sources(sources):
+    """Identifie le contenu des exports (chemin, taille, date de modification) pour invalider le cache."""
+    return [[categorie, os.path.abspath(chemin), os.path.getsize(chemin), os.stat(chemin).st_mtime_ns]
+            for categorie, chemin in sources]
+
+def lire_par_blocs(chemin, taille_bloc):
+    """Itère sur un export CSV ou Excel par DataFrames d'au plus `taille_bloc` lignes (mémoire bornée)."""
+    if chemin.lower().endswith(('.xlsx', '.xlsm')):
+        # pandas.read_excel ne lit pas par blocs : lecture ligne à ligne en mode read_only
+        from openpyxl import load_workbook
+        classeur = load_workbook(chemin, read_only=True, data_only=True)
+        try:
+            lignes = classeur.active.iter_rows(values_only=True)
+            entete = [str(nom).strip() if nom is not None else '' for nom in next(lignes)]
+            while True:
+                bloc = list(itertools.islice(lignes, taille_bloc))
+                if not bloc:
+                    break
+                yield pd.DataFrame(bloc, columns=entete)
+        finally:
+            classeur.close()
+        return
+    # Les exports français utilisent souvent ';' : séparateur détecté sur le début du fichier
+    with open(chemin, encoding='utf-8-sig', newline='') as f:
+        debut = f.read(65536)
+    try:
+        separateur = csv.Sniffer().sniff(debut, delimiters=',;\t').delimiter
+    except csv.Error:
+        separateur = ','
+    yield from pd.read_csv(chemin, sep=separateur, encoding='utf-8-sig', chunksize=taille_bloc)
+
+def depivoter_bloc(df_bloc, categorie):
+    """Dépivote un bloc d'export comme `nettoyer_et_depivoter`, puis nettoie dates et notes.
+
+    Tous les blocs ont le même schéma (dimensions en chaînes, notes en float64) : un type
+    catégoriel ou entier propre à chaque bloc donnerait des fichiers Parquet incompatibles.
+    """
+    colonne_date = "Sélectionnez la date de l'évaluation."
+    df_bloc = df_bloc.rename(columns=lambda nom: str(nom).strip())
+    manquantes = [col for col in COLONNES_IDENTIFIANTS if col not in df_bloc.columns]
+    if manquantes:
+        raise ValueError(f"Colonnes manquantes dans l'export {categorie!r} : {manquantes}")
+    competences = [col for col in df_bloc.columns
+                   if col not in COLONNES_IDENTIFIANTS and col not in COLONNES_IGNOREES_EXPORT
+                   and col and not col.startswith('Unnamed:')]
+    df = nettoyer_et_depivoter(df_bloc[COLONNES_IDENTIFIANTS + competences], COLONNES_IDENTIFIANTS, categorie)
+    # Dates au format français (jj/mm/aaaa), ramenées au jour si l'export porte l'heure ;
+    # cellules vides ou illisibles écartées
+    df[colonne_date] = dates_au_jour(df[colonne_date], dayfirst=True)
+    df['Note'] = pd.to_numeric(df['Note'], errors='coerce').astype(np.float64)
+    df = df.dropna(subset=[colonne_date, 'Note'])
+    for col in COLONNES_DIMENSIONS:
+        df[col] = df[col].astype(str)
+    return df
+
+def construire_cache_exports(sources, dossier, taille_bloc):
+    """Lit chaque export par blocs et écrit un jeu Parquet partitionné par Categorie / mois.
+
+    Seul un bloc dépivoté est en mémoire à un instant donné. Le jeu est construit dans un
+    dossier temporaire, puis substitué à l'ancien avec son manifeste.
+    """
+    colonne_date = "Sélectionnez la date de l'évaluation."
+    temporaire = f"{dossier}.{os.getpid()}.tmp"
+    shutil.rmtree(temporaire, ignore_errors=True)
+    os.makedirs(temporaire)
+    nb_lignes = 0
+    try:
+        for categorie, chemin in sources:
+            print(f"Lecture de l'export {categorie} : {chemin}")
+            for df_bloc in lire_par_blocs(chemin, taille_bloc):
+                df = depivoter_bloc(df_bloc, categorie)
+                if df.empty:
+                    continue
+                df['mois'] = df[colonne_date].dt.strftime('%Y-%m')
+                df.to_parquet(temporaire, engine='pyarrow', index=False, partition_cols=['Categorie', 'mois'])
+                nb_lignes += len(df)
+    except BaseException:
+        shutil.rmtree(temporaire, ignore_errors=True)
+        raise
+    # Préfixe '_' : ignoré par les lecteurs Parquet du dossier
+    with open(os.path.join(temporaire, '_manifeste.json'), 'w', encoding='utf-8') as f:
+        json.dump({'version': VERSION_FORMAT_CACHE_EXPORTS, 'sources': signature_sources(sources),
+                   'lignes': nb_lignes}, f, ensure_ascii=False)
+    shutil.rmtree(dossier, ignore_errors=True)
+    os.replace(temporaire, dossier)
+
+def cache_exports_valide(sources, dossier):
+    chemin = os.path.join(dossier, '_manifeste.json')
+    if not os.path.exists(chemin):
+        return False
+    with open(chemin, encoding='utf-8') as f:
+        manifeste = json.load(f)
+    return manifeste.get('version') == VERSION_FORMAT_CACHE_EXPORTS and manifeste['sources'] == signature_sources(sources)
+
+def preparer_cache_exports(specification=None, dossier=None, taille_bloc=None):
+    """(Re)construit le cache Parquet des exports s'il n'est pas à jour ; renvoie son dossier."""
+    sources = sources_exports(specification or CONFIG['EXPORTS'])
+    dossier = dossier or CONFIG['EXPORTS_CACHE_DIR']
+    if cache_exports_valide(sources, dossier):
+        print(f"Cache Parquet des exports réutilisé : {dossier}")
+    else:
+        construire_cache_exports(sources, dossier, taille_bloc or CONFIG['EXPORTS_TAILLE_BLOC'])
+    return dossier
+
+def charger_exports(specification=None, dossier=None, taille_bloc=None):
+    """Charge les évaluations réelles au format long, depuis le cache Parquet s'il est à jour.
+
+    Le jeu est lu en entier : c'est DF_COMPLET (cube, filtres de période, segments, ingestion).
+    Les statistiques d'entraînement, elles, se calculent par blocs (`blocs_exports`).
+    """
+    dossier = preparer_cache_exports(specification, dossier, taille_bloc)
+    df = pd.read_parquet(dossier, engine='pyarrow')[COLONNES_IDENTIFIANTS + ['Compétence', 'Note', 'Categorie']]
+    # Dimensions converties une seule fois, sur le jeu complet (dictionnaires communs à tous les blocs)
+    for col in COLONNES_DIMENSIONS:
+        df[col] = df[col].astype('category')
+    return df
+
+def charger_donnees_source(graine=None):
+    """Évaluations de départ : exports réels si `CONFIG['EXPORTS']` est renseigné, sinon données fictives.
+
+    Toujours en entier en mémoire (DF_COMPLET, instantané partagé). Seul le remplissage de
+    SQLite à partir des exports s'en passe (`blocs_exports`).
+    """
+    # NOUVEAU : triées par date (et l'instantané partagé l'est donc aussi)
+    if CONFIG['EXPORTS']:
+        return trier_par_date(charger_exports())
+    return trier_par_date(charger_et_nettoyer_donnees(graine=graine))
+
+# --- NOUVEAU : Instantané partagé entre workers (fichiers .npy projetés en mémoire) ---
+VERSION_FORMAT_INSTANTANE = 1
+
+@contextmanager
+def verrou_fichier(chemin):
+    """Verrou exclusif entre processus (fcntl) ; sans fcntl (Windows), aucune exclusion."""
+    with open(chemin, 'a') as f:
+        try:
+            import fcntl
+        except ImportError:
+            yield
+            return
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def parametres_instantane():
+    """Paramètres de génération dont dépend l'instantané (graine fixée : tous les workers voient les mêmes données)."""
+    return {
+        'version': VERSION_FORMAT_INSTANTANE,
+        'mode': CONFIG['DONNEES_MODE'],
+        'nb_evals': CONFIG['DONNEES_NB_EVALS'],
+        'graine': CONFIG['DONNEES_GRAINE'] if CONFIG['DONNEES_GRAINE'] is not None else 0,
+        'exports': signature_sources(sources_exports(CONFIG['EXPORTS'])) if CONFIG['EXPORTS'] else None,
+    }
+
+def ecrire_instantane(df_compact, dossier, parametres):
+    """Écrit chaque colonne (codes de catégories ou valeurs) dans un `.npy`, puis le manifeste en dernier."""
+    colonnes = []
+    for i, col in enumerate(df_compact.columns):
+        serie = df_compact[col]
+        fichier = f"colonne-{i}.npy"
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(dossier, fichier), serie.cat.codes.to_numpy())
+            colonnes.append({'nom': col, 'fichier': fichier, 'categories': serie.cat.categories.tolist()})
+        elif pd.api.types.is_numeric_dtype(serie.dtype) or pd.api.types.is_bool_dtype(serie.dtype):
+            np.save(os.path.join(dossier, fichier), serie.to_numpy())
+            colonnes.append({'nom': col, 'fichier': fichier})
+        else:
+            raise ValueError(f"Colonne non partageable (ni catégorie, ni numérique) : {col!r}")
+    origine = df_compact.attrs.get('origine_dates')
+    manifeste = {
+        'parametres': parametres,
+        'colonnes': colonnes,
+        'origine_dates': origine.isoformat() if origine is not None else None,
+    }
+    # Le manifeste n'apparaît (atomiquement) qu'une fois toutes les colonnes écrites
+    temporaire = os.path.join(dossier, f"manifeste.json.{os.getpid()}.tmp")
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, ensure_ascii=False)
+    os.replace(temporaire, os.path.join(dossier, 'manifeste.json'))
+
+def lire_instantane(dossier, parametres):
+    """Reconstruit DF_COMPLET (compact) sur des tableaux projetés en lecture seule, ou None si absent/périmé.
+
+    Les pages des fichiers restent dans le cache du système : N workers les partagent au lieu
+    d'en garder chacun une copie.
+    """
+    chemin = os.path.join(dossier, 'manifeste.json')
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, encoding='utf-8') as f:
+        manifeste = json.load(f)
+    if manifeste['parametres'] != parametres:
+        return None
+    donnees = {}
+    for colonne in manifeste['colonnes']:
+        valeurs = np.load(os.path.join(dossier, colonne['fichier']), mmap_mode='r')
+        if 'categories' in colonne:
+            valeurs = pd.Categorical.from_codes(valeurs, categories=colonne['categories'], validate=False)
+        donnees[colonne['nom']] = valeurs
+    df = pd.DataFrame(donnees, copy=False)
+    if manifeste['origine_dates'] is not None:
+        df.attrs['origine_dates'] = pd.Timestamp(manifeste['origine_dates'])
+    return df
+
+def publier_artefacts(df_complet):
+    """Premier processus : entraîne et écrit les artefacts (modèle, panel) avant de libérer le verrou.
+
+    Les suivants les rechargent au lieu d'entraîner. Sans dossier d'artefacts, il n'y a rien à
+    publier : les modèles sont entraînés une seule fois, par `initialiser_etat`.
+    """
+    if CONFIG['ARTEFACTS_DIR']:
+        charger_ou_entrainer(df_complet)
+        if CONFIG['PANEL']:
+            charger_ou_entrainer_panel(df_complet, CONFIG['HORIZON_MAX'])
+
+def charger_donnees_partagees(dossier):
+    """Mode multi-workers : le premier processus génère l'instantané et entraîne, les suivants s'y attachent.
+
+    Le verrou fichier garantit une seule génération et un seul entraînement (l'artefact du
+    modèle est ensuite rechargé par chaque worker avec `mmap_mode='r'`).
+    """
+    os.makedirs(dossier, exist_ok=True)
+    parametres = parametres_instantane()
+    with verrou_fichier(os.path.join(dossier, 'instantane.verrou')):
+        df = lire_instantane(dossier, parametres)
+        if df is None:
+            print(f"Génération de l'instantané partagé dans {dossier}...")
+            df_genere = charger_donnees_source(graine=parametres['graine'])
+            ecrire_instantane(compacter_donnees(df_genere), dossier, parametres)
+            del df_genere
+            df = lire_instantane(dossier, parametres)
+            publier_artefacts(df)
+        else:
+            print(f"Instantané partagé projeté en mémoire depuis {dossier}")
+    return df
+
+# --- NOUVEAU : Stockage SQLite des évaluations (fichier partagé, index, agrégats calculés en SQL) ---
+VERSION_FORMAT_SQLITE = 1
+# Colonne de DF_COMPLET -> colonne SQL
+COLONNES_SQLITE = {
+    "Sélectionnez la date de l'évaluation.": 'date_evaluation',
+    'Ligne designer': 'ligne',
+    'Etat du personnel': 'etat',
+    'Article': 'article',
+    'Polyvalence': 'polyvalence',
+    'Collaborateur': 'collaborateur',
+    'Compétence': 'competence',
+    'Note': 'note',
+    'Categorie': 'categorie',
+}
+# Index par colonne ; celui des dates couvre aussi (secteur, note) : la requête groupée des
+# statistiques journalières lit l'index dans l'ordre, sans table ni tri temporaire
+INDEX_SQLITE = {
+    'date_evaluation': 'date_evaluation, categorie, note',
+    'categorie': 'categorie',
+    'ligne': 'ligne',
+    'collaborateur': 'collaborateur',
+}
+
+def lignes_sqlite(df):
+    """Lignes à insérer : dates ISO (AAAA-MM-JJ, triables comme du texte), notes flottantes, le reste en texte."""
+    colonne_date = "Sélectionnez la date de l'évaluation."
+    colonnes = []
+    for col in COLONNES_SQLITE:
+        if col == colonne_date:
+            valeurs = dates_evaluation(df).dt.strftime('%Y-%m-%d')
+        elif col == 'Note':
+            valeurs = pd.to_numeric(df['Note'], errors='coerce').astype(np.float64)
+        else:
+            valeurs = df[col].astype(str)
+        colonnes.append(valeurs.astype(object).where(valeurs.notna(), None).tolist())
+    return zip(*colonnes)
+
+class DepotSQLite:
+    """Évaluations dans un fichier SQLite : filtres et agrégats sont exécutés par SQLite, sur index.
+
+    Tient lieu de DF_COMPLET (RH_SQLITE) : les workers partagent un même fichier au lieu de
+    garder chacun une copie des évaluations. Une connexion par thread et par processus.
+    """
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self._local = threading.local()
+
+    def connexion(self):
+        # Une connexion ouverte avant un fork n'est pas réutilisée par le processus fils
+        if getattr(self._local, 'pid', None) != os.getpid():
+            self._local.connexion = sqlite3.connect(self.chemin, timeout=30)
+            self._local.pid = os.getpid()
+        return self._local.connexion
+
+    def requete(self, sql, parametres=()):
+        return self.connexion().execute(sql, parametres).fetchall()
+
+    def parametres(self):
+        """Paramètres de génération enregistrés avec les données, ou None si la base est vide."""
+        try:
+            lignes = self.requete("SELECT valeur FROM meta WHERE cle = 'parametres'")
+        except sqlite3.OperationalError:
+            return None
+        return json.loads(lignes[0][0]) if lignes else None
+
+    def remplir(self, blocs, parametres):
+        """(Re)crée la table à partir d'évaluations au format long ; les index sont créés après l'insertion.
+
+        `blocs` : un DataFrame, ou un itérable de DataFrames insérés l'un après l'autre (ex.
+        `blocs_exports`) sans jamais réunir toutes les évaluations en mémoire.
+        """
+        if isinstance(blocs, pd.DataFrame):
+            blocs = [blocs]
+        colonnes = ', '.join(f"{nom} {'REAL' if nom == 'note' else 'TEXT'}" for nom in COLONNES_SQLITE.values())
+        connexion = self.connexion()
+        with connexion:
+            connexion.execute("DROP TABLE IF EXISTS evaluations")
+            connexion.execute(f"CREATE TABLE evaluations ({colonnes})")
+            for bloc in blocs:
+                self.inserer(connexion, bloc)
+            for nom, colonnes_index in INDEX_SQLITE.items():
+                connexion.execute(f"CREATE INDEX idx_evaluations_{nom} ON evaluations ({colonnes_index})")
+            connexion.execute("CREATE TABLE IF NOT EXISTS meta (cle TEXT PRIMARY KEY, valeur TEXT)")
+            connexion.execute("INSERT OR REPLACE INTO meta VALUES ('parametres', ?)", (json.dumps(parametres),))
+            self.incrementer_revision(connexion)
+        # Statistiques des index : le planificateur choisit l'index le plus sélectif (date ou secteur)
+        connexion.execute("ANALYZE")
+
+    @staticmethod
+    def inserer(connexion, df):
+        marques = ', '.join('?' * len(COLONNES_SQLITE))
+        connexion.executemany(f"INSERT INTO evaluations VALUES ({marques})", lignes_sqlite(df))
+
+    def ajouter(self, df_lot):
+        """Ajoute un lot d'évaluations (une transaction, qui fait aussi avancer la révision)."""
+        with self.connexion() as connexion:
+            self.inserer(connexion, df_lot)
+            self.incrementer_revision(connexion)
+
+    @staticmethod
+    def incrementer_revision(connexion):
+        connexion.execute("INSERT INTO meta VALUES ('revision', 1) "
+                          "ON CONFLICT(cle) DO UPDATE SET valeur = CAST(valeur AS INTEGER) + 1")
+
+    def revision(self):
+        """Révision des données, stockée dans la base : elle avance à chaque écriture, quel que soit le worker."""
+        lignes = self.requete("SELECT valeur FROM meta WHERE cle = 'revision'")
+        return int(lignes[0][0]) if lignes else 0  # Base remplie avant l'ajout des révisions
+
+    def __len__(self):
+        return self.requete("SELECT COUNT(*) FROM evaluations")[0][0]
+
+    def dimensions(self):
+        """Secteurs et lignes présents (lus sur leurs index)."""
+        categories = [ligne[0] for ligne in self.requete("SELECT DISTINCT categorie FROM evaluations ORDER BY categorie")]
+        lignes = [ligne[0] for ligne in self.requete("SELECT DISTINCT ligne FROM evaluations ORDER BY ligne")]
+        return categories, lignes
+
+    @staticmethod
+    def filtres(categories=None, lignes=None, debut=None, fin=None):
+        """Clause WHERE (et ses paramètres) d'une sélection ; la période porte sur l'index des dates."""
+        conditions, parametres = ["note IS NOT NULL", "date_evaluation IS NOT NULL"], []
+        for colonne, valeurs in (('categorie', categories), ('ligne', lignes)):
+            if valeurs is not None:
+                conditions.append(f"{colonne} IN ({', '.join('?' * len(valeurs))})")
+                parametres += [str(valeur) for valeur in valeurs]
+        if debut is not None:
+            conditions.append("date_evaluation >= ?")
+            parametres.append(debut.strftime('%Y-%m-%d'))
+        if fin is not None:
+            conditions.append("date_evaluation <= ?")
+            parametres.append(fin.strftime('%Y-%m-%d'))
+        return ' AND '.join(conditions), parametres
+
+    def statistiques_journalieres(self):
+        """Statistiques journalières (format de `statistiques_journalieres`) en une seule requête groupée."""
+        colonne_date = "Sélectionnez la date de l'évaluation."
+        where, parametres = self.filtres()
+        df = pd.DataFrame(self.requete(
+            f"SELECT date_evaluation, categorie, SUM(note), COUNT(note) FROM evaluations "
+            f"WHERE {where} GROUP BY date_evaluation, categorie", parametres),
+            columns=[colonne_date, 'Categorie', 'somme_notes', 'nombre_notes'])
+        df[colonne_date] = pd.to_datetime(df[colonne_date])
+        stats = df.groupby(colonne_date)[['somme_notes', 'nombre_notes']].sum()
+        composition = df.pivot(index=colonne_date, columns='Categorie', values='nombre_notes').fillna(0).astype(np.int64)
+        composition.columns = [f"nb_{col}" for col in composition.columns]
+        stats = stats.astype({'somme_notes': np.float64, 'nombre_notes': np.int64}).join(composition)
+        return stats[['somme_notes', 'nombre_notes'] + sorted(composition.columns)]
+
+    def cube(self, categories=None, lignes=None, debut=None, fin=None):
+        """Cellules (somme, nombre) par secteur x ligne x collaborateur d'une sélection (format de `construire_cube`).
+
+        Filtres et sommes sont exécutés par SQLite : seules les cellules remontent en Python.
+        """
+        where, parametres = self.filtres(categories, lignes, debut, fin)
+        cube = pd.DataFrame(self.requete(
+            f"SELECT categorie, ligne, collaborateur, SUM(note), COUNT(note) FROM evaluations "
+            f"WHERE {where} GROUP BY categorie, ligne, collaborateur", parametres),
+            columns=NIVEAUX_CUBE + ['somme', 'nombre'])
+        return cube.astype({'somme': np.float64, 'nombre': np.int64}).set_index(NIVEAUX_CUBE).sort_index()
+
+    def statistiques_panel(self):
+        """Somme et nombre des notes par (collaborateur, jour) (format de `statistiques_panel`)."""
+        colonne_date = "Sélectionnez la date de l'évaluation."
+        where, parametres = self.filtres()
+        panel = pd.DataFrame(self.requete(
+            f"SELECT collaborateur, date_evaluation, SUM(note), COUNT(note) FROM evaluations WHERE {where} "
+            f"GROUP BY collaborateur, date_evaluation ORDER BY collaborateur, date_evaluation", parametres),
+            columns=['Collaborateur', colonne_date, 'somme_notes', 'nombre_notes'])
+        panel[colonne_date] = pd.to_datetime(panel[colonne_date])
+        return panel.astype({'somme_notes': np.float64, 'nombre_notes': np.int64})
+
+    def evaluations(self, categories=None, lignes=None, debut=None, fin=None):
+        """Évaluations d'une sélection, avec les colonnes de DF_COMPLET, ordonnées par date."""
+        colonne_date = "Sélectionnez la date de l'évaluation."
+        where, parametres = self.filtres(categories, lignes, debut, fin)
+        df = pd.DataFrame(self.requete(
+            f"SELECT {', '.join(COLONNES_SQLITE.values())} FROM evaluations WHERE {where} ORDER BY date_evaluation",
+            parametres), columns=list(COLONNES_SQLITE))
+        df[colonne_date] = pd.to_datetime(df[colonne_date])
+        return df.astype({'Note': np.float64})
+
+def charger_depot_sqlite(chemin):
+    """Ouvre la base SQLite ; sous verrou, le premier processus la remplit (données source) et entraîne.
+
+    Une base déjà remplie avec les mêmes paramètres est réutilisée telle quelle, évaluations
+    ingérées comprises : les données ne sont plus reconstruites à chaque démarrage.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(chemin)), exist_ok=True)
+    depot = DepotSQLite(chemin)
+    parametres = json.loads(json.dumps(dict(parametres_instantane(), version=VERSION_FORMAT_SQLITE)))
+    with verrou_fichier(f"{chemin}.verrou"):
+        if depot.parametres() != parametres:
+            print(f"Remplissage de la base SQLite {chemin}...")
+            if CONFIG['EXPORTS']:
+                # NOUVEAU : exports versés bloc par bloc depuis le cache Parquet, sans DataFrame complet
+                preparer_cache_exports()
+                depot.remplir(blocs_exports(colonnes=COLONNES_EVALUATION), parametres)
+            else:
+                depot.remplir(charger_donnees_source(graine=parametres['graine']), parametres)
+            # Premier processus : les artefacts sont écrits avant de libérer le verrou
+            publier_artefacts(depot)
+        else:
+            print(f"Base SQLite {chemin} réutilisée ({len(depot)} évaluations)")
+    return depot
+
 # --- 3. LOGIQUE DU MODÈLE (Identique) ---
-def entrainer_modele(df_complet):
-    """Prépare les données et entraîne un modèle RandomForestRegressor."""
+# Hyperparamètres par défaut de la forêt (aussi inclus dans la clé des artefacts)
+HYPERPARAMETRES_RF = {
+    'n_estimators': 100,
+    'random_state': 42,
+    'min_samples_leaf': 2,
+}
+
+def statistiques_journalieres(df_complet):
+    """Agrège les évaluations par jour en statistiques additives.
+
+    Colonnes : `somme_notes`, `nombre_notes` et `nb_<Categorie>` (effectif par secteur).
+    Deux lots d'évaluations s'agrègent en additionnant leurs statistiques jour par jour.
+    """
     colonne_date = "Sélectionnez la date de l'évaluation."
     
-    df_complet['Note'] = pd.to_numeric(df_complet['Note'], errors='coerce')
-    df_complet[colonne_date] = pd.to_datetime(df_complet[colonne_date], errors='coerce')
+    # Copie locale des seules colonnes utiles : DF_COMPLET (éventuellement compacté) reste intact
+    df_complet = pd.DataFrame({
+        colonne_date: dates_evaluation(df_complet),
+        'Note': pd.to_numeric(df_complet['Note'], errors='coerce').astype(np.float64),
+        'Categorie': df_complet['Categorie'],
+    })
     df_complet = df_complet.dropna(subset=['Note', colonne_date])
+
+    stats = df_complet.groupby(colonne_date)['Note'].agg(['sum', 'count'])
+    stats.columns = ['somme_notes', 'nombre_notes']
+    
+    # Composition des catégories par jour (effectifs, normalisés plus tard en pourcentages)
+    df_composition = df_complet.groupby([colonne_date, 'Categorie'], observed=True).size().unstack(fill_value=0)
+    df_composition.columns = [f"nb_{col}" for col in df_composition.columns]
+    stats = stats.join(df_composition).fillna(0)
+    return stats[['somme_notes', 'nombre_notes'] + sorted(df_composition.columns)]
+
+# --- NOUVEAU : Agrégation journalière hors mémoire (fusion de statistiques partielles) ---
+def additionner_statistiques(stats, autres):
+    """Fusionne deux statistiques journalières (jours et secteurs absents d'un côté valent 0)."""
+    # `fill_value` ne couvre pas un jour absent d'un côté ET un secteur absent de l'autre
+    total = stats.add(autres, fill_value=0).fillna(0)
+    return total[['somme_notes', 'nombre_notes'] + sorted(col for col in total.columns if col.startswith('nb_'))]
+
+def statistiques_par_blocs(blocs):
+    """Agrège un flux de blocs d'évaluations (format long) sans jamais les réunir en mémoire.
+
+    Chaque bloc est réduit par `statistiques_journalieres` puis fusionné : la mémoire de pointe
+    est celle d'un bloc plus une ligne par jour. Les effectifs (et donc les `pct_*`) sont
+    identiques au calcul en une passe ; les sommes de notes ne diffèrent au plus que par
+    l'ordre des additions flottantes.
+    """
+    total = None
+    for bloc in blocs:
+        partielles = statistiques_journalieres(bloc)
+        total = partielles if total is None else additionner_statistiques(total, partielles)
+    if total is None:
+        raise ValueError("Aucune évaluation à agréger")
+    return total
+
+def blocs_depuis_dataframe(df_complet, taille_bloc):
+    """Découpe un DataFrame en tranches successives de `taille_bloc` lignes (vues, sans copie)."""
+    for debut in range(0, len(df_complet), taille_bloc):
+        yield df_complet.iloc[debut:debut + taille_bloc]
+
+def blocs_exports(specification=None, dossier=None, taille_bloc=None, colonnes=None):
+    """Itère sur les évaluations des exports par blocs : depuis le cache Parquet s'il est à jour,
+    sinon directement depuis les fichiers CSV / Excel (dépivotés bloc par bloc).
+
+    `colonnes` : colonnes lues dans le cache (par défaut, celles des statistiques journalières) ;
+    les blocs lus depuis les fichiers ont toutes les colonnes.
+    """
+    colonne_date = "Sélectionnez la date de l'évaluation."
+    colonnes = colonnes or [colonne_date, 'Note', 'Categorie']
+    sources = sources_exports(specification or CONFIG['EXPORTS'])
+    dossier = dossier or CONFIG['EXPORTS_CACHE_DIR']
+    taille_bloc = taille_bloc or CONFIG['EXPORTS_TAILLE_BLOC']
+    if cache_exports_valide(sources, dossier):
+        import pyarrow.dataset as ds
+        jeu = ds.dataset(dossier, format='parquet', partitioning='hive')
+        for lot in jeu.to_batches(columns=colonnes, batch_size=taille_bloc):
+            yield lot.to_pandas()
+        return
+    for categorie, chemin in sources:
+        for df_bloc in lire_par_blocs(chemin, taille_bloc):
+            yield depivoter_bloc(df_bloc, categorie)
+
+def statistiques_de(df_complet):
+    """Statistiques journalières de DF_COMPLET, par blocs si `AGREGATION_TAILLE_BLOC` est fixé.
+
+    DF_COMPLET est alors déjà en mémoire : les blocs ne bornent que les copies temporaires de
+    l'agrégation (dates, notes, secteurs). Pour un `DepotSQLite`, une seule requête groupée.
+    """
+    if isinstance(df_complet, DepotSQLite):
+        return df_complet.statistiques_journalieres()
+    taille_bloc = CONFIG['AGREGATION_TAILLE_BLOC']
+    if taille_bloc and len(df_complet) > taille_bloc:
+        return statistiques_par_blocs(blocs_depuis_dataframe(df_complet, taille_bloc))
+    return statistiques_journalieres(df_complet)
+
+# --- NOUVEAU : Features décalées de la note (retards, moyennes et volatilités glissantes) ---
+DECALAGES_NOTE = (1, 7)
+FENETRES_NOTE = (7, 28)
+COLONNES_DECALEES = ([f"note_j-{decalage}" for decalage in DECALAGES_NOTE]
+                     + [f"{stat}_{fenetre}j" for fenetre in FENETRES_NOTE for stat in ('moyenne', 'volatilite')])
+
+def features_decalees(notes):
+    """Retards et statistiques glissantes d'une série de notes, chaque jour ne voyant que les jours précédents.
+
+    Calcul vectorisé par sommes cumulées ; une fenêtre incomplète porte sur les jours disponibles.
+    Le premier jour, sans passé, reprend sa propre note.
+    """
+    notes = np.asarray(notes, dtype=np.float64)
+    indices = np.arange(len(notes))
+    passe = np.concatenate((notes[:1], notes[:-1]))
+    sommes = np.concatenate(([0.0], np.cumsum(passe)))
+    carres = np.concatenate(([0.0], np.cumsum(passe ** 2)))
+    colonnes = {f"note_j-{decalage}": notes[np.maximum(indices - decalage, 0)] for decalage in DECALAGES_NOTE}
+    for fenetre in FENETRES_NOTE:
+        debut = np.maximum(indices + 1 - fenetre, 0)
+        effectif = indices + 1 - debut
+        moyenne = (sommes[indices + 1] - sommes[debut]) / effectif
+        variance = (carres[indices + 1] - carres[debut]) / effectif - moyenne ** 2
+        colonnes[f"moyenne_{fenetre}j"] = moyenne
+        colonnes[f"volatilite_{fenetre}j"] = np.sqrt(np.maximum(variance, 0.0))
+    return colonnes
+
+def notes_calendaires(jours, notes):
+    """Notes d'un agrégat sur le calendrier complet, du premier au dernier jour observé.
+
+    `jours` : numéros de jour croissants (`jours_total`). Un jour sans évaluation reprend la
+    note du dernier jour observé, comme le fait la prévision récursive entre deux pas.
+    Renvoie `(calendrier, positions)`, `positions` situant chaque jour observé dans le calendrier.
+    """
+    jours = np.asarray(jours, dtype=np.int64)
+    positions = jours - jours[0]
+    dernier_observe = np.zeros(positions[-1] + 1, dtype=np.intp)
+    dernier_observe[positions] = positions
+    calendrier = np.empty(positions[-1] + 1)
+    calendrier[positions] = notes
+    return calendrier[np.maximum.accumulate(dernier_observe)], positions
+
+def ajouter_features_decalees(df_agg):
+    """(Re)calcule en place les colonnes décalées d'un agrégat journalier trié par date.
+
+    Retards et fenêtres se comptent en jours calendaires (ceux que parcourt `prevoir_recursif`),
+    pas en jours observés : la série est d'abord complétée par `notes_calendaires`.
+    """
+    calendrier, positions = notes_calendaires(df_agg['jours_total'].to_numpy(), df_agg['Note'].to_numpy())
+    for nom, valeurs in features_decalees(calendrier).items():
+        df_agg[nom] = valeurs[positions]
+
+def prevoir_recursif(foret, X_futur, indices_decales, notes_passees, ecarts=None):
+    """Prévision multi-pas : les features décalées du jour h viennent des notes observées et des h prédictions précédentes.
+
+    Tout se fait sur des tableaux NumPy (`X_futur` est complété en place), sans DataFrame
+    par pas : chaque pas compare la ligne à tous les nœuds en une opération, puis descend
+    tous les arbres ensemble. `indices_decales` associe chaque colonne décalée à son indice
+    dans `X_futur`. `notes_passees` est la série calendaire (`notes_calendaires`) ; `ecarts`
+    donne, pour chaque ligne, le nombre de jours depuis la précédente (1 par défaut), les
+    jours sautés reprenant la dernière note. Renvoie la matrice (lignes, arbres) des prédictions par arbre.
+    """
+    recul = max(DECALAGES_NOTE + FENETRES_NOTE)
+    notes = [float(note) for note in notes_passees[-recul:]]
+    par_arbre = np.empty((len(X_futur), len(foret.racines)))
+    for h in range(len(X_futur)):
+        if ecarts is not None:
+            notes.extend([notes[-1]] * (int(ecarts[h]) - 1))
+        fin = len(notes)
+        for decalage in DECALAGES_NOTE:
+            X_futur[h, indices_decales[f"note_j-{decalage}"]] = notes[max(fin - decalage, 0)]
+        for fenetre in FENETRES_NOTE:
+            # Même formule que `features_decalees` (moyenne des carrés - carré de la moyenne)
+            valeurs = notes[max(fin - fenetre, 0):]
+            moyenne = sum(valeurs) / len(valeurs)
+            variance = sum(valeur * valeur for valeur in valeurs) / len(valeurs) - moyenne * moyenne
+            X_futur[h, indices_decales[f"moyenne_{fenetre}j"]] = moyenne
+            X_futur[h, indices_decales[f"volatilite_{fenetre}j"]] = math.sqrt(max(variance, 0.0))
+        par_arbre[h] = foret.descendre(foret.suivants(X_futur[h]))
+        notes.append(float(par_arbre[h].mean()))
+    return par_arbre
+
+def features_depuis_statistiques(stats, origine=None):
+    """Construit l'agrégat journalier (note moyenne, composition, calendrier) et la liste des features.
+
+    `origine` est la date du jour 0 de `jours_total` (par défaut, le premier jour de `stats`).
+    """
+    colonne_date = "Sélectionnez la date de l'évaluation."
+    origine = stats.index.min() if origine is None else origine
+
+    # Notes moyennes par jour
+    df_agg = pd.DataFrame({
+        colonne_date: stats.index,
+        'Note': (stats['somme_notes'] / stats['nombre_notes']).to_numpy(),
+    })
     
     # --- DÉBUT DE LA MODIFICATION ---
     # Nous devons inclure la composition des catégories comme "feature"
-    
-    # 1. Calculer la composition des catégories par jour
-    df_composition = df_complet.groupby([colonne_date, 'Categorie']).size().unstack(fill_value=0)
-    # Normaliser pour obtenir des pourcentages (ex: 0.25, 0.30...)
-    df_composition_pct = df_composition.apply(lambda x: x / x.sum(), axis=1)
-    df_composition_pct.columns = [f"pct_{col}" for col in df_composition_pct.columns] # Renomme en 'pct_Maintenance', etc.
-
-    # 2. Agréger les notes moyennes par jour (comme avant)
-    df_agg = df_complet.groupby(colonne_date)['Note'].mean().reset_index()
-    
-    # 3. Fusionner les notes moyennes avec la composition
-    df_agg = pd.merge(df_agg, df_composition_pct, left_on=colonne_date, right_index=True, how='left')
-    df_agg = df_agg.fillna(0) # Remplir les jours sans données (si applicable)
-    
+    # Normaliser pour obtenir des pourcentages (ex: 0.25, 0.30...), renommés en 'pct_Maintenance', etc.
+    effectifs = stats[[col for col in stats.columns if col.startswith('nb_')]]
+    totaux = effectifs.sum(axis=1).to_numpy()
+    for col in effectifs.columns:
+        df_agg[f"pct_{col[3:]}"] = effectifs[col].to_numpy() / totaux
     # --- FIN DE LA MODIFICATION ---
     
-    df_agg = df_agg.sort_values(colonne_date)
-    
-    df_agg['jours_total'] = (df_agg[colonne_date] - df_agg[colonne_date].min()).dt.days
+    df_agg['jours_total'] = (df_agg[colonne_date] - origine).dt.days
     df_agg['jour_de_la_semaine'] = df_agg[colonne_date].dt.dayofweek
     df_agg['jour_du_mois'] = df_agg[colonne_date].dt.day
     df_agg['mois'] = df_agg[colonne_date].dt.month
@@ -519,32 +1483,134 @@ def entrainer_modele(df_complet):
     composition_features = [col for col in df_agg.columns if col.startswith('pct_')]
     features = temporal_features + composition_features
     # --- FIN DE LA MODIFICATION ---
+    if CONFIG['FEATURES_DECALEES']:
+        ajouter_features_decalees(df_agg)
+        features = features + COLONNES_DECALEES
+    return df_agg, features
+
+def erreur_oob(model, X, y):
+    """Écart-type des résidus hors-sac (à défaut, des résidus d'entraînement)."""
+    try:
+        residus_oob = y - model.oob_prediction_
+        return np.std(residus_oob)
+    except Exception:
+        residus_train = y - model.predict(X)
+        return np.std(residus_train)
+
+def entrainer_modele(df_complet, hyperparametres=None, stats=None):
+    """Prépare les données et entraîne un modèle RandomForestRegressor.
+
+    `stats` : statistiques journalières déjà calculées (ex. par `statistiques_par_blocs`) ;
+    `df_complet` n'est alors pas parcouru et peut valoir None. Les hyperparamètres partent de
+    `hyperparametres_retenus()` (gagnant du backtest), y compris pour les modèles de segment.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    if stats is None:
+        stats = statistiques_journalieres(df_complet)
+    df_agg, features = features_depuis_statistiques(stats)
     
     X = df_agg[features]
     y = df_agg['Note']
     
     model = RandomForestRegressor(
-        n_estimators=100, 
-        random_state=42, 
-        min_samples_leaf=2, 
-        oob_score=True
+        **dict(hyperparametres_retenus(), **(hyperparametres or {})),
+        oob_score=True,
+        n_jobs=CONFIG['N_JOBS']
     )
     model.fit(X, y)
-    
-    try:
-        residus_oob = y - model.oob_prediction_
-        std_error = np.std(residus_oob)
-    except Exception:
-        residus_train = y - model.predict(X)
-        std_error = np.std(residus_train)
+    std_error = erreur_oob(model, X, y)
     
     # NOUVEAU : Retourner également l'importance des features
     importances = model.feature_importances_
     
     return model, df_agg, features, std_error, importances
 
-def predire_rf(model, df_historique, features, std_error, jours_a_predire):
-    """Génère les prédictions futures avec un modèle scikit-learn."""
+# --- NOUVEAU : Inférence compacte de la forêt (tableaux de nœuds contigus) ---
+class ForetCompacte:
+    """Forêt scikit-learn aplatie en tableaux NumPy, parcourue pour tous les arbres à la fois.
+
+    Pour les petits lots (au plus HORIZON_MAX lignes), l'appel de chaque arbre par
+    scikit-learn coûte plus que les comparaisons elles-mêmes. Ici, tous les nœuds sont
+    concaténés (indices globaux) et une feuille pointe sur elle-même : `profondeur`
+    itérations vectorisées font descendre chaque couple (ligne, arbre) jusqu'à sa feuille.
+    """
+
+    def __init__(self, model):
+        arbres = [estimateur.tree_ for estimateur in model.estimators_]
+        tailles = np.array([arbre.node_count for arbre in arbres])
+        self.racines = np.concatenate(([0], np.cumsum(tailles)[:-1])).astype(np.intp)
+        self.profondeur = max(arbre.max_depth for arbre in arbres)
+        self.feature, self.seuil, self.gauche, self.droite, self.valeur = (np.concatenate(parties) for parties in zip(*(
+            self.aplatir(arbre, decalage) for arbre, decalage in zip(arbres, self.racines))))
+
+    @staticmethod
+    def aplatir(arbre, decalage):
+        """Tableaux d'un arbre : indices d'enfants globaux, feuilles bouclant sur elles-mêmes."""
+        indices = np.arange(arbre.node_count, dtype=np.intp)
+        feuille = arbre.children_left == -1
+        gauche = np.where(feuille, indices, arbre.children_left) + decalage
+        droite = np.where(feuille, indices, arbre.children_right) + decalage
+        feature = np.where(feuille, 0, arbre.feature).astype(np.intp)
+        return feature, arbre.threshold.astype(np.float64), gauche, droite, arbre.value[:, 0, 0].astype(np.float64)
+
+    def predictions_par_arbre(self, X):
+        """Renvoie la prédiction de chaque arbre, de forme (lignes, arbres)."""
+        # Comme scikit-learn : X en float32, comparé au seuil en float64
+        X = np.asarray(X, dtype=np.float32)
+        lignes = np.arange(len(X))[:, None]
+        noeuds = np.broadcast_to(self.racines, (len(X), len(self.racines)))
+        for _ in range(self.profondeur):
+            noeuds = np.where(X[lignes, self.feature[noeuds]] <= self.seuil[noeuds],
+                              self.gauche[noeuds], self.droite[noeuds])
+        return self.valeur[noeuds]
+
+    def suivants(self, x):
+        """Pour une ligne x, le nœud atteint depuis chaque nœud (une feuille renvoie à elle-même)."""
+        x = np.asarray(x, dtype=np.float32)
+        return np.where(x.take(self.feature) <= self.seuil, self.gauche, self.droite)
+
+    def descendre(self, suivants):
+        """Prédiction de chaque arbre : `profondeur` sauts dans le tableau `suivants` depuis les racines."""
+        noeuds = self.racines
+        for _ in range(self.profondeur):
+            noeuds = suivants.take(noeuds)
+        return self.valeur.take(noeuds)
+
+    def predict(self, X):
+        """Moyenne des arbres, égale à `model.predict` à la précision flottante près."""
+        return self.predictions_par_arbre(X).mean(axis=1)
+
+def intervalle_par_arbres(std_error):
+    """Vrai si la bande vient des arbres : mode `arbres`, ou erreur globale inconnue (None après un warm start)."""
+    return CONFIG['INTERVALLE_MODE'] == 'arbres' or std_error is None
+
+def intervalle_prevision(predictions, par_arbre, std_error):
+    """Bornes basse/haute de la prévision pour chaque date.
+
+    En mode `arbres`, ce sont les quantiles des prédictions individuelles des arbres,
+    calculés en une passe sur la matrice (jours, arbres) ; sinon ± 1,96 x l'erreur globale.
+    """
+    if intervalle_par_arbres(std_error):
+        alpha = (1 - CONFIG['INTERVALLE_NIVEAU']) / 2
+        return np.quantile(par_arbre, [alpha, 1 - alpha], axis=1)
+    return predictions - 1.96 * std_error, predictions + 1.96 * std_error
+
+def libelle_intervalle(par_arbres):
+    """Légende de la bande de prévision selon l'origine de l'intervalle."""
+    if par_arbres:
+        return f"Intervalle {CONFIG['INTERVALLE_NIVEAU']:.0%} (arbres)"
+    return 'Intervalle de confiance 95%'
+
+def besoin_foret_compacte(features, std_error):
+    """Vrai si `predire_rf` passe par la forêt compacte (features décalées, inférence compacte ou intervalle par arbres)."""
+    return (any(col in COLONNES_DECALEES for col in features)
+            or CONFIG['INFERENCE_COMPACTE'] or intervalle_par_arbres(std_error))
+
+def predire_rf(model, df_historique, features, std_error, jours_a_predire, foret=None):
+    """Génère les prédictions futures avec un modèle scikit-learn.
+
+    `foret` : `ForetCompacte` du modèle déjà construite (celle du paquet), sinon construite ici si besoin.
+    """
     
     colonne_date = 'Sélectionnez la date de l\'évaluation.'
     
@@ -572,18 +1638,38 @@ def predire_rf(model, df_historique, features, std_error, jours_a_predire):
         for col in composition_features:
             df_futur[col] = avg_composition[col]
             
+    # NOUVEAU : colonnes décalées remplies pas à pas par `prevoir_recursif`
+    colonnes_decalees = [col for col in features if col in COLONNES_DECALEES]
+    for col in colonnes_decalees:
+        df_futur[col] = 0.0
+
     # S'assurer que l'ordre des colonnes est le même que celui de l'entraînement
     X_futur = df_futur[features] 
     # --- FIN DE LA MODIFICATION ---
     
-    predictions = model.predict(X_futur)
+    # NOUVEAU : une seule passe sur tous les arbres et tous les jours de l'horizon
+    par_arbre = None
+    if colonnes_decalees:
+        # Chaque jour dépend des prédictions précédentes : prévision récursive sur la forêt compacte
+        indices_decales = {col: list(features).index(col) for col in colonnes_decalees}
+        notes_passees, _ = notes_calendaires(df_historique['jours_total'].to_numpy(), df_historique['Note'].to_numpy())
+        par_arbre = prevoir_recursif(foret or ForetCompacte(model), X_futur.to_numpy(dtype=np.float64),
+                                     indices_decales, notes_passees)
+        predictions = par_arbre.mean(axis=1)
+    elif CONFIG['INFERENCE_COMPACTE'] or intervalle_par_arbres(std_error):
+        par_arbre = (foret or ForetCompacte(model)).predictions_par_arbre(X_futur.to_numpy())
+    if not colonnes_decalees:
+        predictions = par_arbre.mean(axis=1) if CONFIG['INFERENCE_COMPACTE'] else model.predict(X_futur)
+    limite_basse, limite_haute = intervalle_prevision(predictions, par_arbre, std_error)
     
     df_pred = pd.DataFrame({
         'Date': dates_futures,
         'Prédiction': predictions,
-        'Limite_basse': predictions - 1.96 * std_error,
-        'Limite_haute': predictions + 1.96 * std_error
+        'Limite_basse': limite_basse,
+        'Limite_haute': limite_haute
     })
+    # Légende de la bande, conservée par les tranches de `TablePrevision`
+    df_pred.attrs['libelle_intervalle'] = libelle_intervalle(intervalle_par_arbres(std_error))
     
     df_hist_plot = df_historique.rename(columns={
         colonne_date: 'Date', 
@@ -592,9 +1678,268 @@ def predire_rf(model, df_historique, features, std_error, jours_a_predire):
     
     return df_pred, df_hist_plot
 
+# --- NOUVEAU : Formats d'image servis par les routes /plot/<nom> ---
+FORMATS_IMAGE = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+def figure_en_octets(fig, format_image='png'):
+    """Sérialise une figure Matplotlib en PNG ou SVG puis la ferme."""
+    buf = io.BytesIO()
+    # Sans date dans les métadonnées SVG, une même figure donne les mêmes octets (ETag fort)
+    metadata = {'Date': None} if format_image == 'svg' else None
+    fig.savefig(buf, format=format_image, bbox_inches='tight', metadata=metadata)
+    plt.close(fig)
+    return buf.getvalue()
+
+# --- NOUVEAU : Artefacts du modèle persistés sur disque ---
+VERSION_FORMAT_ARTEFACT = 3
+
+def cle_artefact(stats, hyperparametres):
+    """Empreinte (SHA-256) des statistiques journalières d'entraînement et des hyperparamètres.
+
+    Le modèle ne dépend des évaluations qu'à travers ces statistiques : les empreinter évite
+    de parcourir DF_COMPLET une seconde fois.
+    """
+    empreinte = hashlib.sha256()
+    empreinte.update(json.dumps({
+        'format': VERSION_FORMAT_ARTEFACT,
+        'sklearn': sklearn.__version__,
+        'hyperparametres': hyperparametres,
+        'colonnes': list(stats.columns),
+        'features_decalees': CONFIG['FEATURES_DECALEES'],
+    }, sort_keys=True).encode('utf-8'))
+    empreinte.update(pd.util.hash_pandas_object(stats, index=True).to_numpy().tobytes())
+    return empreinte.hexdigest()
+
+def charger_ou_entrainer(df_complet, hyperparametres=None, stats=None, metadonnees=None):
+    """Réutilise l'artefact correspondant aux données et hyperparamètres, sinon entraîne et le sauvegarde.
+
+    Renvoie le même tuple que `entrainer_modele`. Les artefacts sont des fichiers joblib non
+    compressés, rechargés avec `mmap_mode='r'` : les tableaux NumPy (historique notamment)
+    sont projetés en mémoire au lieu d'être copiés.
+    """
+    hyperparametres = dict(hyperparametres_retenus(), **(hyperparametres or {}))
+    if stats is None:
+        stats = statistiques_de(df_complet)
+    dossier = CONFIG['ARTEFACTS_DIR']
+    if not dossier:
+        return entrainer_modele(df_complet, hyperparametres, stats)
+
+    cle = cle_artefact(stats, hyperparametres)
+    chemin = os.path.join(dossier, f"modele-{cle[:32]}.joblib")
+    artefact = lire_artefact(chemin, cle)
+    if artefact is not None:
+        return (artefact['model'], artefact['df_historique'], artefact['features'],
+                artefact['std_error'], artefact['importances'])
+
+    resultat = entrainer_modele(df_complet, hyperparametres, stats)
+    model, df_historique, features, std_error, importances = resultat
+    ecrire_artefact(chemin, {
+        'cle': cle,
+        'hyperparametres': hyperparametres,
+        'model': model,
+        'df_historique': df_historique,
+        'features': features,
+        'std_error': std_error,
+        'importances': importances,
+        'metadonnees': metadonnees or {},
+    })
+    return resultat
+
+def lire_artefact(chemin, cle):
+    """Recharge (`mmap_mode='r'`) l'artefact `chemin` s'il existe et porte la clé `cle`, sinon None."""
+    if not os.path.exists(chemin):
+        return None
+    try:
+        artefact = joblib.load(chemin, mmap_mode='r')
+        if artefact['cle'] == cle:
+            print(f"Artefact réutilisé : {chemin}")
+            os.utime(chemin) # Marque l'artefact comme récemment utilisé
+            return artefact
+    except Exception as e:
+        print(f"Artefact illisible, nouvel entraînement : {e}")
+    return None
+
+def ecrire_artefact(chemin, artefact):
+    """Sauvegarde un artefact puis purge les plus anciens de même préfixe (`modele-`, `panel-`)."""
+    dossier = os.path.dirname(chemin)
+    os.makedirs(dossier, exist_ok=True)
+    # Écriture atomique : un autre processus ne lit jamais un artefact partiel
+    temporaire = f"{chemin}.{os.getpid()}.tmp"
+    joblib.dump(artefact, temporaire)
+    os.replace(temporaire, chemin)
+    print(f"Artefact sauvegardé : {chemin}")
+    purger_artefacts(dossier, CONFIG['ARTEFACTS_MAX'], os.path.basename(chemin).split('-')[0] + '-')
+
+def purger_artefacts(dossier, nb_max, prefixe='modele-'):
+    """Ne conserve que les `nb_max` artefacts de préfixe `prefixe` les plus récemment utilisés."""
+    artefacts = sorted(
+        (os.path.join(dossier, nom) for nom in os.listdir(dossier)
+         if nom.startswith(prefixe) and nom.endswith('.joblib')),
+        key=os.path.getmtime, reverse=True
+    )
+    for chemin in artefacts[nb_max:]:
+        os.remove(chemin)
+
+# --- NOUVEAU : Backtesting à origines glissantes et recherche d'hyperparamètres en parallèle ---
+GRILLE_HYPERPARAMETRES = {
+    'n_estimators': [50, 100, 200],
+    'min_samples_leaf': [1, 2, 5],
+    'max_features': [1.0, 'sqrt'],
+}
+# Matrice de features (X, y, jours, colonnes de composition) installée une fois par processus du pool
+MATRICE_BACKTEST = None
+
+def initialiser_processus_backtest(X, y, jours, colonnes_composition, indices_decales):
+    global MATRICE_BACKTEST
+    MATRICE_BACKTEST = (X, y, jours, colonnes_composition, indices_decales)
+
+def plis_glissants(nb_jours, nb_plis, horizon):
+    """Origines des plis : le pli k apprend sur `[0, origine)` et prévoit `[origine, origine + horizon)`."""
+    origines = [nb_jours - horizon * (nb_plis - k) for k in range(nb_plis)]
+    if origines[0] < 2 * horizon:
+        raise ValueError(f"Historique trop court ({nb_jours} jours) pour {nb_plis} plis de {horizon} jours")
+    return origines
+
+def evaluer_pli(hyperparametres, origine, horizon):
+    """Entraîne sur le passé d'une origine et mesure l'erreur sur les `horizon` jours suivants.
+
+    Comme dans `predire_rf`, la composition des jours prévus est la moyenne du passé et les
+    features décalées éventuelles sont recalculées à partir des prédictions (pas des notes réelles).
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    X, y, jours, colonnes_composition, indices_decales = MATRICE_BACKTEST
+    X_test = X[origine:origine + horizon].copy()
+    X_test[:, colonnes_composition] = X[:origine, colonnes_composition].mean(axis=0)
+
+    model = RandomForestRegressor(**hyperparametres, n_jobs=1)
+    debut = time.perf_counter()
+    model.fit(X[:origine], y[:origine])
+    duree_fit = time.perf_counter() - debut
+    debut = time.perf_counter()
+    if indices_decales:
+        # Les lignes sont des jours observés : la récursion avance d'autant de jours calendaires qui les séparent
+        notes_passees, _ = notes_calendaires(jours[:origine], y[:origine])
+        ecarts = np.diff(jours[origine - 1:origine + horizon])
+        prediction = prevoir_recursif(ForetCompacte(model), X_test, indices_decales, notes_passees, ecarts).mean(axis=1)
+    else:
+        prediction = model.predict(X_test)
+    duree_prediction = time.perf_counter() - debut
+
+    erreurs = prediction - y[origine:origine + horizon]
+    return {
+        'mae': float(np.abs(erreurs).mean()),
+        'rmse': float(np.sqrt((erreurs ** 2).mean())),
+        'duree_fit': duree_fit,
+        'duree_prediction': duree_prediction,
+    }
+
+def rechercher_hyperparametres(stats, grille=None, nb_plis=None, horizon=None, nb_processus=None):
+    """Backteste chaque combinaison de la grille (plis x combinaisons dans un pool de processus).
+
+    La matrice de features est construite une seule fois et transmise à chaque processus à
+    son démarrage. Renvoie `(rapport, meilleurs)` : un DataFrame trié par MAE moyenne (puis
+    durée d'entraînement) et les hyperparamètres complets de la meilleure combinaison.
+    """
+    grille = grille or CONFIG['BACKTEST_GRILLE'] or GRILLE_HYPERPARAMETRES
+    nb_plis = nb_plis or CONFIG['BACKTEST_PLIS']
+    horizon = horizon or CONFIG['BACKTEST_HORIZON']
+
+    df_agg, features = features_depuis_statistiques(stats)
+    X = df_agg[features].to_numpy(dtype=np.float64)
+    y = df_agg['Note'].to_numpy(dtype=np.float64)
+    jours = df_agg['jours_total'].to_numpy()
+    colonnes_composition = [i for i, feature in enumerate(features) if feature.startswith('pct_')]
+    indices_decales = {feature: i for i, feature in enumerate(features) if feature in COLONNES_DECALEES}
+    origines = plis_glissants(len(y), nb_plis, horizon)
+
+    noms = sorted(grille)
+    configurations = [dict(HYPERPARAMETRES_RF, **dict(zip(noms, valeurs)))
+                      for valeurs in itertools.product(*(grille[nom] for nom in noms))]
+    with ProcessPoolExecutor(max_workers=nb_processus or CONFIG['BACKTEST_PROCESSUS'],
+                             initializer=initialiser_processus_backtest,
+                             initargs=(X, y, jours, colonnes_composition, indices_decales)) as executeur:
+        futurs = {(i, origine): executeur.submit(evaluer_pli, configuration, origine, horizon)
+                  for i, configuration in enumerate(configurations) for origine in origines}
+        mesures = {cle: futur.result() for cle, futur in futurs.items()}
+
+    lignes = []
+    for i, configuration in enumerate(configurations):
+        plis = pd.DataFrame([mesures[(i, origine)] for origine in origines])
+        lignes.append({'configuration': i, **{nom: configuration[nom] for nom in noms}, **plis.mean().to_dict()})
+    rapport = pd.DataFrame(lignes).sort_values(['mae', 'duree_fit']).reset_index(drop=True)
+    meilleurs = configurations[int(rapport.loc[0, 'configuration'])]
+    return rapport.drop(columns='configuration'), meilleurs
+
+def chemin_hyperparametres():
+    return os.path.join(CONFIG['ARTEFACTS_DIR'], 'hyperparametres.json')
+
+def hyperparametres_retenus():
+    """HYPERPARAMETRES_RF, remplacés par le gagnant du dernier backtest s'il a été enregistré."""
+    if CONFIG['ARTEFACTS_DIR'] and os.path.exists(chemin_hyperparametres()):
+        with open(chemin_hyperparametres(), encoding='utf-8') as f:
+            return dict(HYPERPARAMETRES_RF, **json.load(f)['hyperparametres'])
+    return dict(HYPERPARAMETRES_RF)
+
+def executer_backtest():
+    """Recherche les hyperparamètres, enregistre le gagnant et entraîne l'artefact correspondant."""
+    df_complet = charger_donnees_source()
+    stats = statistiques_de(df_complet)
+    rapport, meilleurs = rechercher_hyperparametres(stats)
+    print(rapport.to_string(float_format=lambda v: f"{v:.4f}"))
+    print(f"✅ Hyperparamètres retenus : {meilleurs}")
+    if not CONFIG['ARTEFACTS_DIR']:
+        print("RH_ARTEFACTS_DIR est vide : le gagnant n'est pas enregistré.")
+        return rapport, meilleurs
+    os.makedirs(CONFIG['ARTEFACTS_DIR'], exist_ok=True)
+    backtest = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'plis': CONFIG['BACKTEST_PLIS'],
+        'horizon': CONFIG['BACKTEST_HORIZON'],
+        'rapport': json.loads(rapport.to_json(orient='records')),
+    }
+    temporaire = f"{chemin_hyperparametres()}.{os.getpid()}.tmp"
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump({'hyperparametres': meilleurs, 'backtest': backtest}, f, ensure_ascii=False, indent=2)
+    os.replace(temporaire, chemin_hyperparametres())
+    # L'artefact du gagnant embarque le résumé du backtest ; il sera réutilisé au prochain démarrage
+    charger_ou_entrainer(df_complet, meilleurs, stats, metadonnees={'backtest': backtest})
+    return rapport, meilleurs
+
+# --- NOUVEAU : Table de prévision pré-calculée sur l'horizon maximal ---
+class TablePrevision:
+    """Prévision calculée une seule fois par modèle entraîné, sur l'horizon maximal.
+
+    Les prédictions ne dépendent pas de l'horizon demandé (les features futures sont
+    calendaires et la composition moyenne) : un horizon plus court est une tranche.
+    """
+
+    def __init__(self, model, df_historique, features, std_error, horizon_max, foret=None):
+        self.horizon_max = horizon_max
+        self.df_pred, self.df_hist_plot = predire_rf(model, df_historique, features, std_error, horizon_max, foret)
+        self.note_actuelle = float(df_historique['Note'].iloc[-1])
+
+    def borner(self, jours_a_predire):
+        """Ramène un horizon demandé dans [1, horizon_max]."""
+        return min(max(jours_a_predire, 1), self.horizon_max)
+
+    def tranche(self, jours_a_predire):
+        """Renvoie les `jours_a_predire` premiers jours de la prévision (sans recalcul)."""
+        return self.df_pred.iloc[:self.borner(jours_a_predire)]
+
+    def kpis(self, jours_a_predire):
+        """Calcule les KPIs (note actuelle, prédiction J+7, tendance journalière) pour un horizon."""
+        jours_a_predire = self.borner(jours_a_predire)
+        predictions = self.df_pred['Prédiction'].to_numpy()
+        tendance_val = (predictions[jours_a_predire - 1] - predictions[0]) / jours_a_predire
+        return {
+            'note_actuelle': self.note_actuelle,
+            'pred_j7': float(predictions[min(6, jours_a_predire - 1)]),
+            'tendance_val': float(tendance_val),
+        }
+
 # --- NOUVELLE FONCTION : Générateur de graphiques à barres ---
-def generer_barplot_base64(data, title, xlabel, ylabel):
-    """Crée un graphique à barres Matplotlib et le convertit en Base64."""
+def generer_barplot(data, title, xlabel, ylabel, format_image='png'):
+    """Crée un graphique à barres Matplotlib et renvoie l'image brute (PNG ou SVG)."""
     if data.empty:
         return None
     
@@ -614,145 +1959,1836 @@ def generer_barplot_base64(data, title, xlabel, ylabel):
         ax.text(v + 0.02, i, f"{v:.2f}", color='black', va='center')
         
     plt.tight_layout()
+    return figure_en_octets(fig, format_image)
+
+# --- NOUVELLE FONCTION : Graphique de prévision ---
+def generer_graphique_prevision(df_hist_plot, df_pred, format_image='png'):
+    """Trace l'historique et la prévision (avec intervalle) et renvoie l'image brute."""
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.plot(df_hist_plot['Date'], df_hist_plot['Note_hist'], 'o-', label='Données historiques', color='blue', linewidth=2, markersize=4)
+    ax.plot(df_pred['Date'], df_pred['Prédiction'], 's-', label='Prédictions', color='red', linewidth=2, markersize=4)
+    ax.fill_between(df_pred['Date'], 
+                    df_pred['Limite_basse'], 
+                    df_pred['Limite_haute'], 
+                    alpha=0.2, color='red', label=df_pred.attrs['libelle_intervalle'])
+    ax.set_xlabel('Date', fontsize=12)
+    ax.set_ylabel('Note moyenne', fontsize=12)
+    ax.set_title('Évolution et Prévision des Notes (Modèle RandomForest)', fontsize=14, fontweight='bold')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    return figure_en_octets(fig, format_image)
+
+# --- NOUVELLE FONCTION : Graphique des Key Influencers ---
+def generer_graphique_influenceurs(importances, features, format_image='png'):
+    """Trace l'importance des features du modèle, avec des libellés lisibles."""
+    # Traduction des noms techniques des features
+    feature_name_map = {
+        'jours_total': 'Tendance (Jours)',
+        'jour_de_la_semaine': 'Jour de la semaine',
+        'jour_du_mois': 'Jour du mois',
+        'mois': 'Mois de l\'année',
+        'jour_de_l_annee': 'Jour de l\'année',
+        'pct_Maintenance': 'Influence Maintenance',
+        'pct_Production': 'Influence Production',
+        'pct_Qualité': 'Influence Qualité',
+        'pct_Méthode': 'Influence Méthode'
+    }
+    importances_series = pd.Series(importances, index=features)
+    importances_series.index = importances_series.index.map(lambda x: feature_name_map.get(x, x))
+    importances_series = importances_series.sort_values(ascending=False)
     
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', bbox_inches='tight')
-    plt.close(fig)
-    return base64.b64encode(buf.getvalue()).decode('utf-8')
+    # NOUVEAU : barres tracées par le moteur configuré pour ce format
+    return moteur_graphique(format_image).barres(
+        importances_series, 
+        'Importance des Facteurs Clés', 
+        'Facteur', 
+        'Importance (Score)',
+        format_image
+    )
+
+# --- NOUVEAU : Moteur de graphiques SVG natif (chaînes construites directement, sans Matplotlib) ---
+POLICE_SVG = "DejaVu Sans, Arial, sans-serif"
+LARGEUR_CARACTERE_SVG = 7 # Largeur moyenne (px) d'un caractère en 12 px, pour dimensionner les marges
+
+def echapper_svg(texte):
+    return html.escape(str(texte), quote=True)
+
+def graduations(vmin, vmax, nb_max=8):
+    """Renvoie des graduations « rondes » (pas de 1, 2, 2,5 ou 5 x 10^k) couvrant [vmin, vmax]."""
+    if not vmax > vmin:
+        vmin, vmax = vmin - 0.5, vmax + 0.5
+    brut = (vmax - vmin) / nb_max
+    puissance = 10 ** math.floor(math.log10(brut))
+    pas = next(m * puissance for m in (1, 2, 2.5, 5, 10) if m * puissance >= brut)
+    debut = math.floor(vmin / pas) * pas
+    nb = int(math.ceil(round((vmax - debut) / pas, 9)))
+    return [round(debut + i * pas, 10) for i in range(nb + 1)]
+
+def document_svg(largeur, hauteur, elements, definitions=''):
+    """Assemble un document SVG autonome et renvoie ses octets (identiques pour une même entrée)."""
+    entete = (f'<svg xmlns="http://www.w3.org/2000/svg" width="{largeur}" height="{hauteur}" '
+              f'viewBox="0 0 {largeur} {hauteur}" font-family="{POLICE_SVG}" font-size="12">')
+    fond = f'<rect width="{largeur}" height="{hauteur}" fill="white"/>'
+    return (entete + (f'<defs>{definitions}</defs>' if definitions else '') + fond
+            + ''.join(elements) + '</svg>').encode('utf-8')
+
+def texte_svg(x, y, contenu, **attributs):
+    attributs = ''.join(f' {nom.replace("_", "-")}="{valeur}"' for nom, valeur in attributs.items())
+    return f'<text x="{x:.1f}" y="{y:.1f}"{attributs}>{echapper_svg(contenu)}</text>'
+
+def points_svg(xs, ys):
+    return ' '.join(f"{x:.1f},{y:.1f}" for x, y in zip(xs, ys))
+
+def svg_barplot(data, title, xlabel, ylabel, format_image='svg'):
+    """Équivalent SVG natif de `generer_barplot` : barres horizontales, meilleur en haut."""
+    if data.empty:
+        return None
+    noms = data.index.astype(str).tolist()
+    valeurs = data.to_numpy(dtype=float)
+
+    largeur = 1000
+    hauteur = max(500, 110 + 32 * len(valeurs))
+    x0 = 50 + LARGEUR_CARACTERE_SVG * max(len(nom) for nom in noms)
+    x1, y0, y1 = largeur - 60, 45, hauteur - 60
+    ticks = graduations(min(0.0, valeurs.min()), valeurs.max())
+    vmin, vmax = ticks[0], ticks[-1]
+    def abscisse(v):
+        return x0 + (v - vmin) / (vmax - vmin) * (x1 - x0)
+    creneau = (y1 - y0) / len(valeurs)
+
+    elements = [texte_svg(largeur / 2, 25, title, text_anchor='middle', font_size=16, font_weight='bold')]
+    for tick in ticks:
+        x = abscisse(tick)
+        elements.append(f'<line x1="{x:.1f}" y1="{y0}" x2="{x:.1f}" y2="{y1}" stroke="#b0b0b0" stroke-opacity="0.3"/>')
+        elements.append(texte_svg(x, y1 + 16, f"{tick:g}", text_anchor='middle'))
+    zero = abscisse(0.0)
+    for i, (nom, valeur) in enumerate(zip(noms, valeurs)):
+        y = y0 + i * creneau
+        gauche, droite = sorted((zero, abscisse(valeur)))
+        elements.append(f'<rect x="{gauche:.1f}" y="{y + 0.1 * creneau:.1f}" width="{droite - gauche:.1f}" '
+                        f'height="{0.8 * creneau:.1f}" fill="#0068c9"/>')
+        elements.append(texte_svg(x0 - 6, y + creneau / 2, nom, text_anchor='end', dominant_baseline='middle'))
+        elements.append(texte_svg(abscisse(valeur) + 4, y + creneau / 2, f"{valeur:.2f}", dominant_baseline='middle'))
+    elements.append(f'<rect x="{x0:.1f}" y="{y0}" width="{x1 - x0:.1f}" height="{y1 - y0}" fill="none" stroke="black"/>')
+    # Comme `generer_barplot` : l'axe horizontal porte `ylabel`, l'axe vertical `xlabel`
+    elements.append(texte_svg((x0 + x1) / 2, hauteur - 20, ylabel, text_anchor='middle', font_size=13))
+    elements.append(texte_svg(18, (y0 + y1) / 2, xlabel, text_anchor='middle', font_size=13,
+                              transform=f"rotate(-90 18 {(y0 + y1) / 2:.1f})"))
+    return document_svg(largeur, hauteur, elements)
+
+def svg_graphique_prevision(df_hist_plot, df_pred, format_image='svg'):
+    """Équivalent SVG natif de `generer_graphique_prevision` : historique, prévision et intervalle."""
+    def en_jours(dates):
+        return pd.to_datetime(dates).to_numpy(dtype='datetime64[ns]').astype(np.int64) / 86_400e9
+    jours_hist, notes_hist = en_jours(df_hist_plot['Date']), df_hist_plot['Note_hist'].to_numpy(dtype=float)
+    jours_pred = en_jours(df_pred['Date'])
+    prediction = df_pred['Prédiction'].to_numpy(dtype=float)
+    basse, haute = df_pred['Limite_basse'].to_numpy(dtype=float), df_pred['Limite_haute'].to_numpy(dtype=float)
+
+    largeur, hauteur = 1200, 600
+    x0, x1, y0, y1 = 70, largeur - 20, 45, hauteur - 110
+    tous_jours = np.concatenate([jours_hist, jours_pred])
+    jmin, jmax = tous_jours.min(), tous_jours.max()
+    if jmax == jmin:
+        jmax = jmin + 1
+    ticks_y = graduations(np.nanmin(np.concatenate([notes_hist, basse])), np.nanmax(np.concatenate([notes_hist, haute])))
+    vmin, vmax = ticks_y[0], ticks_y[-1]
+    def abscisse(jours):
+        return x0 + (jours - jmin) / (jmax - jmin) * (x1 - x0)
+    def ordonnee(valeurs):
+        return y1 - (valeurs - vmin) / (vmax - vmin) * (y1 - y0)
+
+    definitions = (
+        '<marker id="rond" markerWidth="8" markerHeight="8" refX="4" refY="4" markerUnits="userSpaceOnUse">'
+        '<circle cx="4" cy="4" r="3" fill="blue"/></marker>'
+        '<marker id="carre" markerWidth="8" markerHeight="8" refX="4" refY="4" markerUnits="userSpaceOnUse">'
+        '<rect x="1" y="1" width="6" height="6" fill="red"/></marker>'
+    )
+    elements = [texte_svg(largeur / 2, 25, 'Évolution et Prévision des Notes (Modèle RandomForest)',
+                          text_anchor='middle', font_size=16, font_weight='bold')]
+    for tick in ticks_y:
+        y = ordonnee(tick)
+        elements.append(f'<line x1="{x0}" y1="{y:.1f}" x2="{x1}" y2="{y:.1f}" stroke="#b0b0b0" stroke-opacity="0.3"/>')
+        elements.append(texte_svg(x0 - 6, y, f"{tick:g}", text_anchor='end', dominant_baseline='middle'))
+    pas_jours = max(1, int(math.ceil((jmax - jmin) / 10)))
+    for jour in np.arange(math.ceil(jmin), jmax + 1e-9, pas_jours):
+        x = abscisse(jour)
+        libelle = (np.datetime64('1970-01-01') + np.timedelta64(int(round(jour)), 'D')).astype(str)
+        elements.append(f'<line x1="{x:.1f}" y1="{y0}" x2="{x:.1f}" y2="{y1}" stroke="#b0b0b0" stroke-opacity="0.3"/>')
+        elements.append(texte_svg(x, y1 + 14, libelle, text_anchor='end', transform=f"rotate(-45 {x:.1f} {y1 + 14})"))
+
+    bande = points_svg(np.concatenate([abscisse(jours_pred), abscisse(jours_pred[::-1])]),
+                       np.concatenate([ordonnee(haute), ordonnee(basse[::-1])]))
+    elements.append(f'<polygon points="{bande}" fill="red" fill-opacity="0.2"/>')
+    for jours, notes, couleur, marqueur in ((jours_hist, notes_hist, 'blue', 'rond'), (jours_pred, prediction, 'red', 'carre')):
+        elements.append(f'<polyline points="{points_svg(abscisse(jours), ordonnee(notes))}" fill="none" stroke="{couleur}" '
+                        f'stroke-width="2" marker-start="url(#{marqueur})" marker-mid="url(#{marqueur})" marker-end="url(#{marqueur})"/>')
+    elements.append(f'<rect x="{x0}" y="{y0}" width="{x1 - x0}" height="{y1 - y0}" fill="none" stroke="black"/>')
+
+    # Légende (coin supérieur droit)
+    lx, ly = x1 - 250, y0 + 10
+    elements.append(f'<rect x="{lx}" y="{ly}" width="240" height="70" fill="white" fill-opacity="0.8" stroke="#cccccc" rx="3"/>')
+    elements.append(f'<polyline points="{lx + 10},{ly + 15} {lx + 25},{ly + 15} {lx + 40},{ly + 15}" stroke="blue" stroke-width="2" marker-mid="url(#rond)"/>')
+    elements.append(f'<polyline points="{lx + 10},{ly + 35} {lx + 25},{ly + 35} {lx + 40},{ly + 35}" stroke="red" stroke-width="2" marker-mid="url(#carre)"/>')
+    elements.append(f'<rect x="{lx + 10}" y="{ly + 49}" width="30" height="12" fill="red" fill-opacity="0.2"/>')
+    for decalage, libelle in ((15, 'Données historiques'), (35, 'Prédictions'), (55, df_pred.attrs['libelle_intervalle'])):
+        elements.append(texte_svg(lx + 50, ly + decalage, libelle, dominant_baseline='middle'))
+
+    elements.append(texte_svg((x0 + x1) / 2, hauteur - 15, 'Date', text_anchor='middle', font_size=13))
+    elements.append(texte_svg(18, (y0 + y1) / 2, 'Note moyenne', text_anchor='middle', font_size=13,
+                              transform=f"rotate(-90 18 {(y0 + y1) / 2:.1f})"))
+    return document_svg(largeur, hauteur, elements, definitions)
+
+# --- NOUVEAU : Moteurs de graphiques interchangeables ---
+class MoteurGraphique(namedtuple('MoteurGraphique', ['nom', 'formats', 'barres', 'prevision'])):
+    """Un moteur de rendu : formats produits et fonctions `barres(...)` / `prevision(...)`."""
+    __slots__ = ()
+
+MOTEURS_GRAPHIQUES = {
+    'matplotlib': MoteurGraphique('matplotlib', ('png', 'svg'), generer_barplot, generer_graphique_prevision),
+    'svg': MoteurGraphique('svg', ('svg',), svg_barplot, svg_graphique_prevision),
+}
+
+def format_graphiques():
+    """Format par défaut des graphiques, déduit du moteur en vigueur (y compris surchargé par `create_app`)."""
+    return CONFIG['PLOT_FORMAT'] or ('svg' if CONFIG['GRAPHIQUES_MOTEUR'] == 'svg' else 'png')
+
+def moteur_graphique(format_image):
+    """Renvoie le moteur configuré s'il sait produire `format_image`, sinon Matplotlib (repli)."""
+    moteur = MOTEURS_GRAPHIQUES.get(CONFIG['GRAPHIQUES_MOTEUR'], MOTEURS_GRAPHIQUES['matplotlib'])
+    return moteur if format_image in moteur.formats else MOTEURS_GRAPHIQUES['matplotlib']
+
+# --- NOUVEAU : Cache LRU des graphiques rendus ---
+class CacheLRU:
+    """Cache borné (éviction LRU) et partagé entre threads, avec compteurs de succès/échecs.
+
+    `vider()` incrémente une génération : un calcul lancé avant l'invalidation
+    n'est pas réinséré dans le cache une fois terminé.
+    """
+
+    def __init__(self, taille_max):
+        self.taille_max = taille_max
+        self.succes = 0
+        self.echecs = 0
+        self._entrees = OrderedDict()
+        self._generation = 0
+        self._verrou = threading.Lock()
+
+    def obtenir_ou_calculer(self, cle, fabrique):
+        """Renvoie la valeur associée à `cle`, en la calculant via `fabrique()` si absente."""
+        with self._verrou:
+            if cle in self._entrees:
+                self._entrees.move_to_end(cle)
+                self.succes += 1
+                return self._entrees[cle]
+            self.echecs += 1
+            generation = self._generation
+
+        # Le rendu se fait hors verrou pour ne pas bloquer les autres requêtes
+        valeur = fabrique()
+
+        with self._verrou:
+            if generation == self._generation and self.taille_max > 0:
+                self._entrees[cle] = valeur
+                self._entrees.move_to_end(cle)
+                while len(self._entrees) > self.taille_max:
+                    self._entrees.popitem(last=False)
+        return valeur
+
+    def vider(self):
+        """Invalide toutes les entrées (à appeler quand le modèle ou les données changent)."""
+        with self._verrou:
+            self._entrees.clear()
+            self._generation += 1
+
+    def statistiques(self):
+        """Renvoie la taille courante et les compteurs de succès/échecs."""
+        with self._verrou:
+            total = self.succes + self.echecs
+            return {
+                'taille': len(self._entrees),
+                'taille_max': self.taille_max,
+                'succes': self.succes,
+                'echecs': self.echecs,
+                'taux_succes': self.succes / total if total else 0.0,
+            }
+
+# --- NOUVEAU : Métriques (chronos par étape, histogrammes, format Prometheus) ---
+# Bornes (en secondes) des histogrammes de latence
+BORNES_LATENCE = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogramme:
+    """Histogramme à bornes fixes : un compteur par intervalle, la somme et le nombre d'observations."""
+
+    def __init__(self, bornes):
+        self.bornes = bornes
+        self.comptes = [0] * (len(bornes) + 1) # Le dernier intervalle est « +Inf »
+        self.somme = 0.0
+
+    def observer(self, valeur):
+        # `le` est inclusif dans le format Prometheus : bisect_left range `valeur == borne` sous la borne
+        self.comptes[bisect.bisect_left(self.bornes, valeur)] += 1
+        self.somme += valeur
+
+class Metriques:
+    """Registre des métriques du processus, partagé entre threads.
+
+    Une observation coûte un verrou et une recherche dichotomique : les chronos restent
+    actifs en production.
+    """
+
+    def __init__(self, bornes=BORNES_LATENCE):
+        self.bornes = bornes
+        self._histogrammes = {}
+        self._jauges = {}
+        self._descriptions = {}
+        self._verrou = threading.Lock()
+
+    def decrire(self, nom, description):
+        """Associe un texte d'aide (# HELP) à une métrique."""
+        self._descriptions[nom] = description
+
+    def observer(self, nom, valeur, **etiquettes):
+        """Ajoute une observation à l'histogramme `nom` pour ces étiquettes."""
+        cle = (nom, tuple(sorted(etiquettes.items())))
+        with self._verrou:
+            histogramme = self._histogrammes.get(cle)
+            if histogramme is None:
+                histogramme = self._histogrammes[cle] = Histogramme(self.bornes)
+            histogramme.observer(valeur)
+
+    def definir(self, nom, valeur, **etiquettes):
+        """Fixe la valeur d'une jauge."""
+        with self._verrou:
+            self._jauges[(nom, tuple(sorted(etiquettes.items())))] = valeur
+
+    @contextmanager
+    def chrono(self, nom, **etiquettes):
+        """Mesure la durée du bloc et l'ajoute à l'histogramme `nom`."""
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observer(nom, time.perf_counter() - debut, **etiquettes)
+
+    def exporter(self, jauges_supplementaires=(), compteurs_supplementaires=()):
+        """Rend toutes les métriques au format texte de Prometheus (version 0.0.4).
+
+        `jauges_supplementaires` / `compteurs_supplementaires` : triplets `(nom, valeur, etiquettes)`
+        lus au moment de l'export (état des caches, mémoire...), qui n'ont pas besoin d'être
+        tenus à jour en continu.
+        """
+        with self._verrou:
+            histogrammes = [(cle, list(h.comptes), h.somme) for cle, h in self._histogrammes.items()]
+            valeurs = [(cle, valeur, 'gauge') for cle, valeur in self._jauges.items()]
+        for supplementaires, type_metrique in ((jauges_supplementaires, 'gauge'), (compteurs_supplementaires, 'counter')):
+            valeurs += [((nom, tuple(sorted(etiquettes.items()))), valeur, type_metrique)
+                        for nom, valeur, etiquettes in supplementaires]
+
+        lignes = []
+        deja_decrites = set()
+        def entete(nom, type_metrique):
+            if nom not in deja_decrites:
+                deja_decrites.add(nom)
+                if nom in self._descriptions:
+                    lignes.append(f"# HELP {nom} {self._descriptions[nom]}")
+                lignes.append(f"# TYPE {nom} {type_metrique}")
+
+        for (nom, etiquettes), comptes, somme in sorted(histogrammes):
+            entete(nom, 'histogram')
+            cumul = 0
+            for borne, compte in zip(list(self.bornes) + ['+Inf'], comptes):
+                cumul += compte
+                le = borne if borne == '+Inf' else repr(float(borne))
+                lignes.append(f"{nom}_bucket{format_etiquettes(etiquettes + (('le', le),))} {cumul}")
+            lignes.append(f"{nom}_sum{format_etiquettes(etiquettes)} {somme!r}")
+            lignes.append(f"{nom}_count{format_etiquettes(etiquettes)} {cumul}")
+        for (nom, etiquettes), valeur, type_metrique in sorted(valeurs, key=lambda entree: entree[0]):
+            if valeur is None:
+                continue
+            entete(nom, type_metrique)
+            lignes.append(f"{nom}{format_etiquettes(etiquettes)} {float(valeur)!r}")
+        return "\n".join(lignes) + "\n"
+
+def format_etiquettes(etiquettes):
+    """Formate des étiquettes `(nom, valeur)` en `{nom="valeur",...}` (valeurs échappées)."""
+    if not etiquettes:
+        return ''
+    def echapper(valeur):
+        return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{nom}="{echapper(valeur)}"' for nom, valeur in etiquettes) + '}'
+
+def memoire_processus():
+    """Renvoie `(rss, rss_max)` du processus en octets (None si indisponible sur la plateforme)."""
+    rss = rss_max = None
+    try:
+        with open('/proc/self/statm') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+        rss_max = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        rss_max *= 1 if sys.platform == 'darwin' else 1024
+    except ImportError:
+        pass
+    return rss, rss_max
+
+METRIQUES = Metriques()
+METRIQUES.decrire('rh_requete_duree_secondes', "Durée des requêtes HTTP par route.")
+METRIQUES.decrire('rh_etape_duree_secondes', "Durée de chaque étape du traitement d'une requête.")
+METRIQUES.decrire('rh_demarrage_duree_secondes', "Durée des étapes du démarrage (chargement des données, entraînement).")
+
+# --- NOUVEAU : Cube pré-agrégé (somme, nombre) par Secteur x Ligne x Collaborateur ---
+NIVEAUX_CUBE = ['Categorie', 'Ligne designer', 'Collaborateur']
+
+def construire_cube(df_complet):
+    """Pré-agrège les notes en (somme, nombre) par (Categorie, Ligne designer, Collaborateur)."""
+    notes = pd.to_numeric(df_complet['Note'], errors='coerce').astype(np.float64)
+    cube = (
+        notes.groupby([df_complet[col] for col in NIVEAUX_CUBE], observed=True)
+        .agg(['sum', 'count'])
+        .rename(columns={'sum': 'somme', 'count': 'nombre'})
+        .reset_index()
+    )
+    # Niveaux en chaînes simples : le cube est petit et les regroupements restent « observés »
+    cube[NIVEAUX_CUBE] = cube[NIVEAUX_CUBE].astype(str)
+    return cube.set_index(NIVEAUX_CUBE).sort_index()
+
+def agreger_depuis_cube(cube, categories, lignes):
+    """Renvoie les moyennes (décroissantes) par collaborateur, secteur et ligne pour une sélection.
+
+    Équivalent aux `groupby(...).mean()` sur les lignes filtrées, mais le coût ne dépend que
+    du nombre de cellules du cube, pas du nombre d'évaluations.
+    """
+    masque = (
+        cube.index.get_level_values('Categorie').isin(categories) &
+        cube.index.get_level_values('Ligne designer').isin(lignes)
+    )
+    selection = cube[masque & (cube['nombre'].to_numpy() > 0)]
+
+    def moyennes(niveau):
+        totaux = selection.groupby(level=niveau).sum()
+        return (totaux['somme'] / totaux['nombre']).rename('Note').sort_values(ascending=False)
+
+    return moyennes('Collaborateur'), moyennes('Categorie'), moyennes('Ligne designer')
+
+def signature_filtres(categories, lignes):
+    """Normalise une sélection de filtres (ordre et doublons indifférents) en clé de cache."""
+    return tuple(sorted(set(categories))), tuple(sorted(set(lignes)))
+
+def filtrer_donnees(categories, lignes, debut=None, fin=None):
+    """Renvoie les évaluations des secteurs et lignes sélectionnés, datées de `debut` à `fin`.
+
+    La période est d'abord découpée dans DF_COMPLET trié par date : les masques secteur/ligne
+    ne parcourent que les lignes de la période.
+    """
+    if isinstance(DF_COMPLET, DepotSQLite):
+        return DF_COMPLET.evaluations(categories, lignes, debut, fin)
+    df = DF_COMPLET.iloc[tranche_periode(DF_COMPLET, debut, fin)]
+    return df[
+        (df['Categorie'].isin(categories)) &
+        (df['Ligne designer'].isin(lignes))
+    ]
+
+
+# --- NOUVEAU : Modèles par segment (Secteur / Ligne), entraînés à la demande ---
+def taille_modele(model):
+    """Estime l'empreinte mémoire (octets) des arbres d'une forêt scikit-learn."""
+    total = 0
+    for estimateur in model.estimators_:
+        etat = estimateur.tree_.__getstate__()
+        total += etat['nodes'].nbytes + etat['values'].nbytes
+    return total
+
+class ModeleSegment:
+    """Modèle entraîné sur un segment, avec sa prévision pré-calculée et sa taille estimée."""
+
+    def __init__(self, model, features, importances, prevision):
+        self.model = model
+        self.features = features
+        self.importances = importances
+        self.prevision = prevision
+        self.octets = taille_modele(model) + int(prevision.df_pred.memory_usage(deep=True).sum())
+
+def initialiser_processus_segment(config):
+    """Installe la configuration du serveur dans un processus du pool (démarré par 'spawn', il ne l'hérite pas)."""
+    CONFIG.update(config)
+
+def entrainer_segment(df_segment, horizon_max):
+    """Entraîne le modèle d'un segment et pré-calcule sa prévision (exécuté dans un processus du pool)."""
+    model, df_historique, features, std_error, importances = entrainer_modele(df_segment)
+    prevision = TablePrevision(model, df_historique, features, std_error, horizon_max)
+    return ModeleSegment(model, features, importances, prevision)
+
+class RegistreSegments:
+    """Registre borné (LRU en nombre d'entrées et en octets) des modèles par segment.
+
+    Un segment absent est soumis à un pool de processus et signalé « en_cours » :
+    la requête n'attend jamais la fin d'un entraînement. Les demandes sont comptées
+    pour pouvoir pré-entraîner les segments les plus demandés. Le segment est réservé
+    sous verrou mais filtré hors verrou : les autres consultations n'attendent pas ce parcours.
+    """
+
+    PRET, EN_COURS, INDISPONIBLE = 'pret', 'en_cours', 'indisponible'
+
+    def __init__(self, taille_max, octets_max, nb_processus, min_jours):
+        self.taille_max = taille_max
+        self.octets_max = octets_max
+        self.nb_processus = nb_processus
+        self.min_jours = min_jours
+        self.octets = 0
+        self._entrees = OrderedDict()
+        self._en_cours = {}
+        self._indisponibles = {}
+        self._demandes = Counter()
+        self._selections = {}
+        self._generation = 0
+        self._executeur = None
+        self._pid_executeur = None
+        # Réentrant : le rappel de fin peut s'exécuter dans le thread qui soumet
+        self._verrou = threading.RLock()
+
+    def obtenir(self, cle, categories, lignes):
+        """Renvoie `(statut, ModeleSegment ou None)` et lance l'entraînement si nécessaire."""
+        with self._verrou:
+            self._demandes[cle] += 1
+            self._selections[cle] = (categories, lignes)
+            if cle in self._entrees:
+                self._entrees.move_to_end(cle)
+                return self.PRET, self._entrees[cle]
+            if cle in self._en_cours:
+                return self.EN_COURS, None
+            if cle in self._indisponibles:
+                return self.INDISPONIBLE, None
+            generation = self._reserver(cle)
+        return self._soumettre(cle, categories, lignes, generation), None
+
+    def prechauffer(self, nb, candidats=()):
+        """Soumet jusqu'à `nb` segments, les plus demandés d'abord, complétés par `candidats`."""
+        with self._verrou:
+            selections = dict(candidats)
+            selections.update(self._selections)
+            cles = [cle for cle, _ in self._demandes.most_common()]
+            cles += [cle for cle, _ in candidats if cle not in self._demandes]
+            reserves = [(cle, self._reserver(cle)) for cle in cles[:nb]
+                        if cle not in self._entrees and cle not in self._en_cours and cle not in self._indisponibles]
+        for cle, generation in reserves:
+            self._soumettre(cle, *selections[cle], generation)
+
+    def demarrer(self):
+        """Crée le pool de ce processus (au démarrage ; de nouveau dans un worker issu d'un fork).
+
+        Les processus du pool sont lancés par 'spawn' : un fork du serveur multi-thread
+        pourrait hériter d'un verrou tenu par un autre thread.
+        """
+        with self._verrou:
+            if self._pid_executeur != os.getpid():
+                self._executeur = ProcessPoolExecutor(
+                    max_workers=self.nb_processus, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=initialiser_processus_segment, initargs=(dict(CONFIG),))
+                self._pid_executeur = os.getpid()
+
+    def vider(self):
+        """Oublie tous les modèles (nouvelles données) ; les compteurs de demandes sont conservés."""
+        with self._verrou:
+            self._generation += 1
+            self._entrees.clear()
+            self._en_cours.clear()
+            self._indisponibles.clear()
+            self.octets = 0
+
+    def statistiques(self):
+        """Renvoie l'état du registre (entrées, octets, entraînements en cours, demandes)."""
+        with self._verrou:
+            return {
+                'prets': len(self._entrees),
+                'en_cours': len(self._en_cours),
+                'indisponibles': len(self._indisponibles),
+                'octets': self.octets,
+                'octets_max': self.octets_max,
+                'demandes': sum(self._demandes.values()),
+            }
+
+    def _reserver(self, cle):
+        """Marque `cle` « en_cours » avant son filtrage (sous verrou) ; renvoie la génération courante."""
+        self._en_cours[cle] = None
+        return self._generation
+
+    def _soumettre(self, cle, categories, lignes, generation):
+        """Filtre le segment hors verrou puis le soumet au pool ; renvoie son statut."""
+        colonne_date = "Sélectionnez la date de l'évaluation."
+        try:
+            # Seules les colonnes utiles à l'entraînement traversent la frontière du processus
+            df_segment = filtrer_donnees(categories, lignes)[[colonne_date, 'Note', 'Categorie']]
+            erreur = None if dates_evaluation(df_segment).nunique() >= self.min_jours else "Données insuffisantes pour ce segment"
+        except Exception as e:
+            erreur = str(e)
+        self.demarrer()
+        with self._verrou:
+            if generation != self._generation:
+                return self.EN_COURS # Données remplacées pendant le filtrage : une prochaine demande le relancera
+            if erreur is not None:
+                del self._en_cours[cle]
+                self._indisponibles[cle] = erreur
+                return self.INDISPONIBLE
+            future = self._executeur.submit(entrainer_segment, df_segment, CONFIG['HORIZON_MAX'])
+            self._en_cours[cle] = future
+            future.add_done_callback(partial(self._terminer, cle, generation))
+            return self.EN_COURS
+
+    def _terminer(self, cle, generation, future):
+        with self._verrou:
+            if generation != self._generation:
+                return # Résultat calculé sur des données périmées
+            self._en_cours.pop(cle, None)
+            try:
+                entree = future.result()
+            except Exception as e:
+                print(f"Erreur lors de l'entraînement du segment {cle} : {e}")
+                self._indisponibles[cle] = str(e)
+                return
+            self._entrees[cle] = entree
+            self.octets += entree.octets
+            while self._entrees and (len(self._entrees) > self.taille_max or
+                                     (self.octets > self.octets_max and len(self._entrees) > 1)):
+                _, evincee = self._entrees.popitem(last=False)
+                self.octets -= evincee.octets
+
+def cle_segment(categories, lignes):
+    """Clé du segment d'une sélection selon CONFIG['SEGMENTS_MODE'] (None : modèle global)."""
+    mode = CONFIG['SEGMENTS_MODE']
+    categories, lignes = signature_filtres(categories, lignes)
+    par_categorie = mode in ('categorie', 'les_deux') and set(categories) != set(ALL_CATEGORIES)
+    par_ligne = mode in ('ligne', 'les_deux') and set(lignes) != set(ALL_LIGNES)
+    if not (par_categorie or par_ligne):
+        return None
+    return (categories if par_categorie else None, lignes if par_ligne else None)
+
+def selection_segment(cle):
+    """Sélection (secteurs, lignes) des données d'entraînement d'un segment."""
+    categories, lignes = cle
+    return (list(categories) if categories is not None else ALL_CATEGORIES,
+            list(lignes) if lignes is not None else ALL_LIGNES)
+
+def prevision_pour(paquet, categories, lignes):
+    """Renvoie `(TablePrevision, statut, cle)` : celle du segment s'il est prêt, sinon celle du paquet."""
+    cle = cle_segment(categories, lignes)
+    if cle is None:
+        return paquet.prevision, None, None
+    statut, entree = REGISTRE_SEGMENTS.obtenir(cle, *selection_segment(cle))
+    if statut == RegistreSegments.PRET:
+        return entree.prevision, statut, cle
+    return paquet.prevision, statut, cle
+
+def prechauffer_segments(nb):
+    """Pré-entraîne les `nb` segments les plus demandés (à défaut : chaque secteur, chaque ligne)."""
+    mode = CONFIG['SEGMENTS_MODE']
+    candidats = []
+    if mode in ('categorie', 'les_deux'):
+        candidats += [cle_segment([c], ALL_LIGNES) for c in ALL_CATEGORIES]
+    if mode in ('ligne', 'les_deux'):
+        candidats += [cle_segment(ALL_CATEGORIES, [l]) for l in ALL_LIGNES]
+    REGISTRE_SEGMENTS.prechauffer(nb, [(cle, selection_segment(cle)) for cle in candidats if cle])
+
+# --- NOUVEAU : Prévision par collaborateur (panel) avec un modèle global unique ---
+FEATURES_PANEL = ['code_collaborateur', 'moyenne_passee', 'nb_evaluations_passees', 'derniere_note',
+                  'jours_depuis_derniere', 'jours_total', 'jour_de_la_semaine', 'jour_du_mois', 'mois',
+                  'jour_de_l_annee']
+# Beaucoup plus de lignes (et plus bruitées) que l'agrégat journalier : feuilles larges et
+# sous-échantillonnage bootstrap, qui régularisent et divisent le temps d'entraînement
+HYPERPARAMETRES_PANEL = {
+    'n_estimators': 100,
+    'random_state': 42,
+    'min_samples_leaf': 50,
+    'max_samples': 0.25,
+}
+
+def statistiques_panel(df_complet):
+    """Somme et nombre des notes par (collaborateur, jour), triés par collaborateur puis par date."""
+    if isinstance(df_complet, DepotSQLite):
+        return df_complet.statistiques_panel()
+    colonne_date = "Sélectionnez la date de l'évaluation."
+    df = pd.DataFrame({
+        'Collaborateur': df_complet['Collaborateur'].astype(str),
+        colonne_date: dates_evaluation(df_complet),
+        'Note': pd.to_numeric(df_complet['Note'], errors='coerce').astype(np.float64),
+    }).dropna(subset=['Note', colonne_date])
+    panel = df.groupby(['Collaborateur', colonne_date])['Note'].agg(['sum', 'count']).reset_index()
+    return panel.rename(columns={'sum': 'somme_notes', 'count': 'nombre_notes'})
+
+def colonnes_calendrier(dates, origine):
+    """Colonnes calendaires (mêmes définitions que `features_depuis_statistiques`)."""
+    dates = pd.DatetimeIndex(dates)
+    return [(dates - origine).days.to_numpy(), dates.dayofweek.to_numpy(), dates.day.to_numpy(),
+            dates.month.to_numpy(), dates.dayofyear.to_numpy()]
+
+def features_panel(panel, origine):
+    """Features de chaque ligne (collaborateur, jour), chaque jour ne voyant que le passé du collaborateur.
+
+    Sommes cumulées sur les lignes triées, remises à zéro à chaque collaborateur : un seul
+    passage vectorisé, sans `groupby.apply`. Le premier jour d'un collaborateur reprend la
+    moyenne générale. Renvoie `(X, y, poids, etat)`, où `etat` décrit chaque collaborateur
+    à sa dernière évaluation (point de départ de la prévision).
+    """
+    colonne_date = "Sélectionnez la date de l'évaluation."
+    codes, collaborateurs = pd.factorize(panel['Collaborateur'], sort=True)
+    somme = panel['somme_notes'].to_numpy(dtype=np.float64)
+    nombre = panel['nombre_notes'].to_numpy(dtype=np.float64)
+    note = somme / nombre
+    jours = (panel[colonne_date] - origine).dt.days.to_numpy()
+    a_priori = somme.sum() / nombre.sum()
+
+    premier = np.r_[True, codes[1:] != codes[:-1]]
+    groupe = np.cumsum(premier) - 1
+    debuts = np.flatnonzero(premier)
+    somme_avant = np.cumsum(somme) - somme
+    nombre_avant = np.cumsum(nombre) - nombre
+    somme_passee = somme_avant - somme_avant[debuts][groupe]
+    nombre_passe = nombre_avant - nombre_avant[debuts][groupe]
+    moyenne_passee = np.where(nombre_passe > 0, somme_passee / np.maximum(nombre_passe, 1), a_priori)
+    derniere_note = np.where(premier, a_priori, np.r_[a_priori, note[:-1]])
+    jours_depuis = np.where(premier, 0, np.r_[0, np.diff(jours)])
+
+    X = np.column_stack([codes, moyenne_passee, nombre_passe, derniere_note, jours_depuis,
+                         *colonnes_calendrier(panel[colonne_date], origine)]).astype(np.float64)
+    fins = np.r_[debuts[1:], len(codes)] - 1
+    sommes_totales = np.add.reduceat(somme, debuts)
+    nombres_totaux = np.add.reduceat(nombre, debuts)
+    etat = {
+        'collaborateurs': np.asarray(collaborateurs, dtype=object),
+        'moyenne': sommes_totales / nombres_totaux,
+        'nombre': nombres_totaux,
+        'derniere_note': note[fins],
+        'dernier_jour': jours[fins],
+    }
+    return X, note, nombre, etat
+
+class PrevisionPanel:
+    """Modèle global entraîné sur les agrégats journaliers de tous les collaborateurs.
+
+    La prévision de chaque collaborateur sur `horizon_max` jours est calculée une fois, en un
+    seul lot (collaborateurs x jours), puis cumulée : la note moyenne prévue sur un horizon
+    quelconque se lit en O(collaborateurs). Seuls ces cumuls sont conservés (et persistés
+    par `charger_ou_entrainer_panel`), pas la forêt.
+    """
+
+    def __init__(self, collaborateurs, cumul, importances, duree_entrainement):
+        self.horizon_max = cumul.shape[1]
+        self.collaborateurs = pd.Index(collaborateurs)
+        self.cumul = cumul
+        self.importances = importances
+        self.duree_entrainement = duree_entrainement
+
+    @classmethod
+    def entrainer(cls, panel, horizon_max):
+        """Entraîne le modèle panel sur `statistiques_panel` et pré-calcule les cumuls de prévision."""
+        from sklearn.ensemble import RandomForestRegressor
+        colonne_date = "Sélectionnez la date de l'évaluation."
+        debut = time.perf_counter()
+        origine = panel[colonne_date].min()
+        X, y, poids, etat = features_panel(panel, origine)
+        model = RandomForestRegressor(**HYPERPARAMETRES_PANEL, n_jobs=CONFIG['N_JOBS'])
+        model.fit(X, y, sample_weight=poids)
+
+        # Lot futur : l'état de chaque collaborateur répété sur chaque jour de l'horizon
+        nb = len(etat['collaborateurs'])
+        dates_futures = pd.date_range(panel[colonne_date].max() + timedelta(days=1), periods=horizon_max, freq='D')
+        calendrier = colonnes_calendrier(dates_futures, origine)
+        X_futur = np.column_stack([
+            np.repeat(np.arange(nb), horizon_max),
+            np.repeat(etat['moyenne'], horizon_max),
+            np.repeat(etat['nombre'], horizon_max),
+            np.repeat(etat['derniere_note'], horizon_max),
+            np.tile(calendrier[0], nb) - np.repeat(etat['dernier_jour'], horizon_max),
+            *(np.tile(colonne, nb) for colonne in calendrier),
+        ]).astype(np.float64)
+        predictions = model.predict(X_futur).reshape(nb, horizon_max)
+        importances = dict(zip(FEATURES_PANEL, model.feature_importances_.round(4).tolist()))
+        return cls(etat['collaborateurs'], np.cumsum(predictions, axis=1), importances, time.perf_counter() - debut)
+
+    def moyennes(self, jours_a_predire):
+        """Note moyenne prévue de chaque collaborateur sur les `jours_a_predire` prochains jours."""
+        jours_a_predire = min(max(jours_a_predire, 1), self.horizon_max)
+        return self.cumul[:, jours_a_predire - 1] / jours_a_predire
+
+    def classement(self, jours_a_predire, n, collaborateurs=None):
+        """Renvoie `(haut, bas)` : les `n` meilleures et moins bonnes notes moyennes prévues.
+
+        `np.argpartition` isole les extrêmes en temps linéaire ; seuls les `n` retenus sont
+        triés (par note décroissante, comme `moyennes_collab`). `collaborateurs` restreint
+        le classement à une sélection (les inconnus du modèle sont ignorés).
+        """
+        moyennes = self.moyennes(jours_a_predire)
+        indices = np.arange(len(moyennes))
+        if collaborateurs is not None:
+            indices = self.collaborateurs.get_indexer(pd.Index(collaborateurs).astype(str))
+            indices = indices[indices >= 0]
+        n = min(n, len(indices))
+        if n == 0:
+            return [], []
+        valeurs = moyennes[indices]
+
+        def extremes(cles):
+            choisis = indices[np.argpartition(cles, n - 1)[:n]]
+            choisis = choisis[np.argsort(-moyennes[choisis], kind='stable')]
+            return [{'Collaborateur': nom, 'Note': note}
+                    for nom, note in zip(self.collaborateurs[choisis], moyennes[choisis].round(4).tolist())]
+
+        return extremes(-valeurs), extremes(valeurs)
+
+def cle_artefact_panel(panel, horizon_max):
+    """Empreinte (SHA-256) des statistiques panel, des hyperparamètres et de l'horizon du modèle panel."""
+    empreinte = hashlib.sha256()
+    empreinte.update(json.dumps({
+        'format': VERSION_FORMAT_ARTEFACT,
+        'sklearn': sklearn.__version__,
+        'hyperparametres': HYPERPARAMETRES_PANEL,
+        'horizon_max': horizon_max,
+    }, sort_keys=True).encode('utf-8'))
+    empreinte.update(pd.util.hash_pandas_object(panel, index=False).to_numpy().tobytes())
+    return empreinte.hexdigest()
+
+def charger_ou_entrainer_panel(df_complet, horizon_max):
+    """Réutilise l'artefact `panel-*` correspondant aux évaluations, sinon entraîne le modèle panel et le sauvegarde.
+
+    L'artefact ne contient que les cumuls de prévision (tableaux NumPy, noms en chaînes fixes) :
+    rechargé avec `mmap_mode='r'`, il est projeté en mémoire et partagé entre workers.
+    """
+    panel = statistiques_panel(df_complet)
+    dossier = CONFIG['ARTEFACTS_DIR']
+    if not dossier:
+        return PrevisionPanel.entrainer(panel, horizon_max)
+
+    cle = cle_artefact_panel(panel, horizon_max)
+    chemin = os.path.join(dossier, f"panel-{cle[:32]}.joblib")
+    artefact = lire_artefact(chemin, cle)
+    if artefact is not None:
+        return PrevisionPanel(artefact['collaborateurs'], artefact['cumul'], artefact['importances'],
+                              artefact['duree_entrainement'])
+
+    prevision = PrevisionPanel.entrainer(panel, horizon_max)
+    ecrire_artefact(chemin, {
+        'cle': cle,
+        'collaborateurs': prevision.collaborateurs.to_numpy(dtype=str),
+        'cumul': prevision.cumul,
+        'importances': prevision.importances,
+        'duree_entrainement': prevision.duree_entrainement,
+    })
+    return prevision
+
+def construire_services():
+    """(Re)crée les caches et le registre des segments à partir de CONFIG."""
+    global CACHE_GRAPHIQUES, CACHE_AGREGATS, REGISTRE_SEGMENTS
+    CACHE_GRAPHIQUES = CacheLRU(CONFIG['CACHE_GRAPHIQUES_TAILLE'])
+    # NOUVEAU : Agrégats (collaborateur, secteur, ligne) par sélection, partagés par '/', /plot et l'API JSON
+    CACHE_AGREGATS = CacheLRU(CONFIG['CACHE_AGREGATS_TAILLE'])
+    REGISTRE_SEGMENTS = RegistreSegments(
+        CONFIG['SEGMENTS_MAX'], CONFIG['SEGMENTS_MEMOIRE_MO'] * 2**20,
+        CONFIG['SEGMENTS_PROCESSUS'], CONFIG['SEGMENTS_MIN_JOURS']
+    )
+
+construire_services()
 
 # --- 4. LE SERVEUR FLASK ---
-app = Flask(__name__)
-
-# Mise en cache globale des données et du modèle pour la performance
-print("Chargement et entraînement du modèle RandomForest au démarrage...")
-DF_COMPLET = charger_et_nettoyer_donnees()
-# NOUVEAU : Stocker les importances des features
-MODELE, DF_HISTORIQUE, FEATURES, STD_ERROR, FEATURE_IMPORTANCES = entrainer_modele(DF_COMPLET)
-ALL_CATEGORIES = DF_COMPLET['Categorie'].unique().tolist()
-ALL_LIGNES = sorted(DF_COMPLET['Ligne designer'].unique())
-print("✅ Modèle prêt !")
-
-@app.route('/')
+# NOUVEAU : Routes regroupées dans un blueprint, enregistré par `create_app`
+tableau = Blueprint('tableau', __name__)
+
+# --- NOUVEAU : Paquet immuable du modèle, échangé atomiquement ---
+class PaquetModele(namedtuple('PaquetModele', [
+        'model', 'df_historique', 'features', 'std_error', 'importances',
+        'prevision', 'version', 'duree_entrainement', 'date_entrainement', 'panel', 'foret'], defaults=(None, None))):
+    """Modèle, historique et prévision d'une même version.
+
+    `foret` : `ForetCompacte` du modèle, construite une fois par paquet (None si la prévision n'en a pas besoin).
+
+    Un paquet n'est jamais modifié : une requête lit `PAQUET` une seule fois et voit
+    ainsi un couple modèle/historique cohérent, même si un ré-entraînement se termine entre-temps.
+    """
+    __slots__ = ()
+
+COMPTEUR_VERSIONS = itertools.count(1)
+# Sérialise les écritures de l'état (ingestion, installation d'un nouveau paquet)
+VERROU_ETAT = threading.Lock()
+
+def construire_paquet(model, df_historique, features, std_error, importances, duree_entrainement, panel=None):
+    """Assemble un paquet avec sa prévision pré-calculée et un nouveau numéro de version."""
+    foret = ForetCompacte(model) if besoin_foret_compacte(features, std_error) else None
+    prevision = TablePrevision(model, df_historique, features, std_error, CONFIG['HORIZON_MAX'], foret)
+    return PaquetModele(model, df_historique, features, std_error, importances, prevision,
+                        next(COMPTEUR_VERSIONS), duree_entrainement, datetime.now(), panel, foret)
+
+def entrainer_paquet(df_complet, stats=None):
+    """Entraîne (ou recharge depuis un artefact) le modèle de `df_complet` et le met en paquet."""
+    debut = time.perf_counter()
+    resultat = charger_ou_entrainer(df_complet, stats=stats)
+    duree_entrainement = time.perf_counter() - debut
+    # NOUVEAU : modèle panel (par collaborateur), s'il est activé
+    panel = charger_ou_entrainer_panel(df_complet, CONFIG['HORIZON_MAX']) if CONFIG['PANEL'] else None
+    return construire_paquet(*resultat, duree_entrainement, panel)
+
+def installer_paquet(paquet):
+    """Met un paquet en service par une seule affectation de référence (échange atomique)."""
+    global PAQUET
+    PAQUET = paquet
+    # Les clés des caches portent la version du paquet : vider ne fait que libérer la mémoire
+    CACHE_GRAPHIQUES.vider()
+    CACHE_AGREGATS.vider()
+
+def reentrainer():
+    """Ré-entraîne le modèle sur un instantané de DF_COMPLET sans bloquer les requêtes.
+
+    Avec SQLite, statistiques et dimensions sont relues dans la base : elles comprennent les
+    lots ingérés par les autres workers. Renvoie False (et redemande un ré-entraînement) si
+    les données ont changé pendant l'entraînement : le paquet obtenu n'y correspondrait plus.
+    """
+    global STATS_JOURNALIERES, ALL_CATEGORIES, ALL_LIGNES
+    with VERROU_ETAT:
+        df_complet, stats, revision = DF_COMPLET, STATS_JOURNALIERES, revision_donnees(PAQUET)
+    depot = df_complet if isinstance(df_complet, DepotSQLite) else None
+    if depot is not None:
+        stats, dimensions = depot.statistiques_journalieres(), depot.dimensions()
+    paquet = entrainer_paquet(df_complet, stats)
+    with VERROU_ETAT:
+        # Ingestion dans ce processus (nouveau paquet) ou écriture dans la base par un autre worker
+        if revision_donnees(PAQUET) != revision:
+            PLANIFICATEUR.declencher()
+            return False
+        if depot is not None:
+            STATS_JOURNALIERES = stats
+            ALL_CATEGORIES, ALL_LIGNES = dimensions
+        installer_paquet(paquet)
+    print(f"✅ Modèle v{paquet.version} en service (entraîné en {paquet.duree_entrainement:.2f} s)")
+    return True
+
+class PlanificateurReentrainement(threading.Thread):
+    """Thread de fond qui ré-entraîne le modèle périodiquement et/ou sur demande."""
+
+    def __init__(self, intervalle):
+        super().__init__(name='planificateur-reentrainement', daemon=True)
+        # Secondes entre deux ré-entraînements (0 : uniquement sur demande)
+        self.intervalle = intervalle
+        self.en_cours = False
+        self.nb_reentrainements = 0
+        self.derniere_erreur = None
+        self._declencheur = threading.Event()
+
+    def declencher(self):
+        """Demande un ré-entraînement dès que possible (les demandes multiples sont fusionnées)."""
+        self._declencheur.set()
+
+    def run(self):
+        while True:
+            self._declencheur.wait(self.intervalle or None)
+            self._declencheur.clear()
+            self.en_cours = True
+            try:
+                if reentrainer():
+                    self.nb_reentrainements += 1
+                self.derniere_erreur = None
+            except Exception as e:
+                print(f"Erreur lors du ré-entraînement : {e}")
+                self.derniere_erreur = str(e)
+            finally:
+                self.en_cours = False
+
+    def statistiques(self):
+        """Renvoie l'état du planificateur."""
+        return {
+            'intervalle': self.intervalle,
+            'en_cours': self.en_cours,
+            'nb_reentrainements': self.nb_reentrainements,
+            'derniere_erreur': self.derniere_erreur,
+        }
+
+def initialiser_etat(df_complet, stats=None):
+    """Installe les données, entraîne le modèle et invalide les caches qui en dépendent.
+
+    `stats` : statistiques journalières déjà agrégées (ex. par blocs depuis les exports) ;
+    par défaut, elles sont calculées sur `df_complet`.
+    """
+    global DF_COMPLET, ALL_CATEGORIES, ALL_LIGNES, CUBE, STATS_JOURNALIERES
+    if isinstance(df_complet, DepotSQLite):
+        # NOUVEAU : évaluations dans SQLite ; pas de cube en mémoire, les agrégats sont des requêtes
+        DF_COMPLET = df_complet
+        ALL_CATEGORIES, ALL_LIGNES = DF_COMPLET.dimensions()
+        debut = time.perf_counter()
+        CUBE = None
+    else:
+        # Un instantané partagé est déjà compact (et projeté en mémoire : ne pas le copier)
+        if CONFIG['DONNEES_COMPACTES'] and 'origine_dates' not in df_complet.attrs:
+            df_compact = compacter_donnees(df_complet)
+            print("Mémoire de DF_COMPLET (octets) :")
+            print(rapport_memoire(df_complet, df_compact).to_string())
+            df_complet = df_compact
+        # NOUVEAU : tri par date (sans copie si les données le sont déjà) pour les filtres de période
+        DF_COMPLET = trier_par_date(df_complet)
+        ALL_CATEGORIES = DF_COMPLET['Categorie'].unique().tolist()
+        ALL_LIGNES = sorted(DF_COMPLET['Ligne designer'].unique())
+        debut = time.perf_counter()
+        CUBE = construire_cube(DF_COMPLET)
+    # NOUVEAU : Statistiques journalières additives, base des mises à jour incrémentales
+    STATS_JOURNALIERES = statistiques_de(DF_COMPLET) if stats is None else stats
+    METRIQUES.definir('rh_demarrage_duree_secondes', time.perf_counter() - debut, etape='agregats')
+    # NOUVEAU : Modèle, historique, importances et prévision (pré-calculée) réunis dans un paquet
+    # Le modèle est entraîné sur ces statistiques : DF_COMPLET n'est pas parcouru une seconde fois
+    paquet = entrainer_paquet(DF_COMPLET, STATS_JOURNALIERES)
+    METRIQUES.definir('rh_demarrage_duree_secondes', paquet.duree_entrainement, etape='entrainement')
+    installer_paquet(paquet)
+    REGISTRE_SEGMENTS.vider()
+    if CONFIG['SEGMENTS_MODE'] != 'aucun' and CONFIG['SEGMENTS_PRECHAUFFAGE']:
+        prechauffer_segments(CONFIG['SEGMENTS_PRECHAUFFAGE'])
+
+PLANIFICATEUR = None
+
+def preparer_etat():
+    """Charge les données, entraîne le modèle et démarre le planificateur de ré-entraînement."""
+    global PLANIFICATEUR
+    # Mise en cache globale des données et du modèle pour la performance
+    print("Chargement et entraînement du modèle RandomForest au démarrage...")
+    debut_chargement = time.perf_counter()
+    stats = None
+    if CONFIG['SQLITE']:
+        df_initial = charger_depot_sqlite(CONFIG['SQLITE'])
+    elif CONFIG['PARTAGE_DIR']:
+        df_initial = charger_donnees_partagees(CONFIG['PARTAGE_DIR'])
+    else:
+        if CONFIG['EXPORTS']:
+            # NOUVEAU : statistiques d'entraînement agrégées bloc par bloc depuis le cache Parquet.
+            # DF_COMPLET est ensuite lu en entier : seule l'agrégation est bornée (RH_SQLITE pour ne
+            # jamais charger tout l'historique)
+            preparer_cache_exports()
+            stats = statistiques_par_blocs(blocs_exports())
+        df_initial = charger_donnees_source()
+    METRIQUES.definir('rh_demarrage_duree_secondes', time.perf_counter() - debut_chargement, etape='chargement_donnees')
+    if CONFIG['SEGMENTS_MODE'] != 'aucun':
+        # NOUVEAU : pool des modèles de segment créé au démarrage, avant toute requête
+        REGISTRE_SEGMENTS.demarrer()
+    initialiser_etat(df_initial, stats)
+    print("✅ Modèle prêt !")
+
+    # NOUVEAU : Ré-entraînement en arrière-plan (périodique et/ou déclenché par /api/modele/reentrainer)
+    if PLANIFICATEUR is None:
+        PLANIFICATEUR = PlanificateurReentrainement(CONFIG['REENTRAINEMENT_INTERVALLE'])
+        PLANIFICATEUR.start()
+
+def relancer_planificateur_apres_fork():
+    """Relance le planificateur dans un worker issu d'un fork (ex. `gunicorn --preload`).
+
+    Les threads ne survivent pas au fork : le worker hérite d'un objet dont `is_alive()` est faux.
+    """
+    global PLANIFICATEUR
+    if PLANIFICATEUR is not None and not PLANIFICATEUR.is_alive():
+        with VERROU_ETAT:
+            if not PLANIFICATEUR.is_alive():
+                PLANIFICATEUR = PlanificateurReentrainement(CONFIG['REENTRAINEMENT_INTERVALLE'])
+                PLANIFICATEUR.start()
+
+# --- NOUVEAU : Préparation immédiate, paresseuse ou en arrière-plan ---
+MODES_PREPARATION = ('immediate', 'paresseuse', 'arriere_plan')
+
+class Preparation:
+    """Suit la préparation des données et du modèle ; un seul appel l'exécute, les autres l'attendent."""
+
+    EN_ATTENTE, EN_COURS, PRETE, ECHEC = 'en_attente', 'en_cours', 'prete', 'echec'
+
+    def __init__(self):
+        self.statut = self.EN_ATTENTE
+        self.erreur = None
+        self.duree = None
+        self._thread = None
+        self._verrou = threading.Lock()
+
+    @property
+    def prete(self):
+        return self.statut == self.PRETE
+
+    def executer(self):
+        """Prépare l'état si ce n'est pas déjà fait ; renvoie True si l'état est prêt."""
+        with self._verrou:
+            if self.prete:
+                return True
+            self.statut, self.erreur = self.EN_COURS, None
+            debut = time.perf_counter()
+            try:
+                preparer_etat()
+            except Exception as e:
+                print(f"Erreur lors de la préparation du modèle : {e}")
+                self.statut, self.erreur = self.ECHEC, str(e)
+                return False
+            self.duree = time.perf_counter() - debut
+            self.statut = self.PRETE
+            return True
+
+    def lancer_en_arriere_plan(self):
+        self._thread = threading.Thread(target=self.executer, name='preparation', daemon=True)
+        self._thread.start()
+
+    def attendre_avant_fork(self):
+        """Avant un fork (ex. workers de `gunicorn --preload`), attend la fin de la préparation en arrière-plan.
+
+        Le thread ne survit pas au fork : le worker hériterait d'une préparation (et d'imports)
+        à moitié faite, sans personne pour la terminer. Il hérite ainsi d'un état prêt.
+        """
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join()
+
+    def statistiques(self):
+        return {'statut': self.statut, 'erreur': self.erreur, 'duree': self.duree}
+
+PREPARATION = Preparation()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=PREPARATION.attendre_avant_fork)
+
+# --- NOUVEAU : Ingestion incrémentale des évaluations ---
+COLONNES_EVALUATION = [
+    "Sélectionnez la date de l'évaluation.", 'Ligne designer', 'Etat du personnel', 'Article',
+    'Polyvalence', 'Collaborateur', 'Compétence', 'Note', 'Categorie'
+]
+
+def preparer_lot(df_lot):
+    """Valide un lot d'évaluations au format long (mêmes colonnes que DF_COMPLET)."""
+    colonne_date = "Sélectionnez la date de l'évaluation."
+    manquantes = [col for col in COLONNES_EVALUATION if col not in df_lot.columns]
+    if manquantes:
+        raise ValueError(f"Colonnes manquantes : {manquantes}")
+    df_lot = df_lot[COLONNES_EVALUATION].copy()
+    # Format déduit date par date : un lot mêlant '2025-11-04' et '2025-11-04T10:30:00Z' est lu en entier
+    df_lot[colonne_date] = dates_au_jour(df_lot[colonne_date], format='mixed')
+    df_lot['Note'] = pd.to_numeric(df_lot['Note'], errors='coerce')
+    df_lot = df_lot.dropna(subset=[colonne_date, 'Note'])
+    if df_lot.empty:
+        raise ValueError("Aucune évaluation valide dans le lot")
+    return df_lot.reset_index(drop=True)
+
+def aligner_sur(df_lot, df_reference):
+    """Convertit un lot au format de `df_reference` (compacté ou non).
+
+    Renvoie `(lot, reference)` : la référence est une copie superficielle dont les
+    catégories (et le type des notes) ont été élargis si le lot l'exige.
+    """
+    colonne_date = "Sélectionnez la date de l'évaluation."
+    df_lot = df_lot.copy()
+    df_reference = df_reference.copy(deep=False)
+    for col in COLONNES_DIMENSIONS:
+        if isinstance(df_reference[col].dtype, pd.CategoricalDtype):
+            nouvelles = pd.Index(df_lot[col].astype(str).unique()).difference(df_reference[col].cat.categories)
+            if len(nouvelles):
+                df_reference[col] = df_reference[col].cat.add_categories(nouvelles)
+            df_lot[col] = pd.Categorical(df_lot[col], categories=df_reference[col].cat.categories)
+    if pd.api.types.is_integer_dtype(df_reference[colonne_date]):
+        df_lot[colonne_date] = (df_lot[colonne_date] - df_reference.attrs['origine_dates']).dt.days.astype(np.int32)
+    if df_reference['Note'].dtype == np.int8 and not (df_lot['Note'] % 1 == 0).all():
+        df_reference['Note'] = df_reference['Note'].astype(np.float32)
+    if df_reference['Note'].dtype in (np.int8, np.float32):
+        df_lot['Note'] = df_lot['Note'].astype(df_reference['Note'].dtype)
+    return df_lot, df_reference
+
+def actualiser_historique(df_historique, stats, jours):
+    """Recalcule l'agrégat journalier pour les seuls `jours` modifiés (ajoutés s'ils sont nouveaux).
+
+    Si le lot recule la première date ou introduit un secteur, `jours_total` ou la liste
+    des features change pour tous les jours : l'agrégat est alors reconstruit depuis `stats`.
+    """
+    colonne_date = "Sélectionnez la date de l'évaluation."
+    origine = df_historique[colonne_date].min()
+    pct_actuels = [col for col in df_historique.columns if col.startswith('pct_')]
+    pct_nouveaux = [f"pct_{col[3:]}" for col in stats.columns if col.startswith('nb_')]
+    if stats.index.min() < origine or pct_actuels != pct_nouveaux:
+        return features_depuis_statistiques(stats)
+
+    lignes, features = features_depuis_statistiques(stats.loc[jours], origine)
+    conserves = df_historique[~df_historique[colonne_date].isin(jours)]
+    df_agg = pd.concat([conserves, lignes], ignore_index=True).sort_values(colonne_date, ignore_index=True)
+    if CONFIG['FEATURES_DECALEES']:
+        # Les retards d'un jour dépendent de ses voisins : recalcul (vectorisé) sur toute la série
+        ajouter_features_decalees(df_agg)
+    return df_agg, features
+
+def completer_foret(model, df_agg, features, anciennes_features):
+    """Ajoute des arbres ajustés sur l'agrégat à jour (warm start) au lieu de tout ré-entraîner.
+
+    La forêt en service n'est pas modifiée (copie). Ré-entraînement complet si les features
+    changent ou si la forêt dépasserait CONFIG['INGESTION_ARBRES_MAX'] arbres.
+
+    Après un warm start, les échantillons hors-sac des anciens arbres seraient retirés pour le
+    nouveau nombre de jours et ne correspondraient plus à leur bootstrap, et l'erreur du dernier
+    entraînement complet ne décrit pas la nouvelle forêt : l'erreur renvoyée vaut None (la bande
+    de prévision vient alors des arbres) jusqu'au prochain ré-entraînement complet.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    X = df_agg[features]
+    y = df_agg['Note']
+    nb_arbres = len(model.estimators_) + CONFIG['INGESTION_ARBRES']
+    reentrainement = list(features) != list(anciennes_features) or nb_arbres > CONFIG['INGESTION_ARBRES_MAX']
+    if reentrainement:
+        model = RandomForestRegressor(**hyperparametres_retenus(), oob_score=True, n_jobs=CONFIG['N_JOBS'])
+        model.fit(X, y)
+        return model, erreur_oob(model, X, y), reentrainement
+    model = copy.deepcopy(model)
+    model.set_params(warm_start=True, n_estimators=nb_arbres, oob_score=False)
+    # Attributs OOB de la forêt d'origine : périmés (autre nombre de jours), ils ne doivent plus être lus
+    for attribut in ('oob_score_', 'oob_prediction_'):
+        vars(model).pop(attribut, None)
+    model.fit(X, y)
+    return model, None, reentrainement
+
+# Sérialise les ingestions entre elles ; les requêtes et le ré-entraînement ne l'attendent pas
+VERROU_INGESTION = threading.Lock()
+
+def ingerer_evaluations(df_lot):
+    """Ajoute un lot d'évaluations et met à jour incrémentalement agrégats, cube, modèle et caches.
+
+    Concaténation, agrégats et warm start sont calculés sur un instantané de l'état, hors de
+    VERROU_ETAT : ce verrou n'est pris que pour échanger les références.
+    """
+    global DF_COMPLET, STATS_JOURNALIERES, CUBE, ALL_CATEGORIES, ALL_LIGNES
+    if CONFIG['PARTAGE_DIR'] and not CONFIG['SQLITE']:
+        # Seul ce worker verrait le lot, et son DF_COMPLET projeté deviendrait une copie privée :
+        # les workers répondraient différemment à une même URL
+        raise RuntimeError("Ingestion impossible avec l'instantané partagé (RH_PARTAGE_DIR) : "
+                           "utiliser RH_SQLITE pour ingérer avec plusieurs workers")
+    df_lot = preparer_lot(df_lot)
+    with VERROU_INGESTION:
+        with VERROU_ETAT:
+            paquet, df_reference, stats_reference, cube_reference = PAQUET, DF_COMPLET, STATS_JOURNALIERES, CUBE
+        depot = df_reference if isinstance(df_reference, DepotSQLite) else None
+        if depot is None:
+            lot_aligne, reference = aligner_sur(df_lot, df_reference)
+            df_complet = pd.concat([reference, lot_aligne], ignore_index=True)
+            df_complet.attrs = dict(reference.attrs)
+            # Un lot daté avant la fin de l'historique impose de retrier (le cas courant reste trié)
+            df_complet = trier_par_date(df_complet)
+            # Cube : addition des cellules du lot
+            cube = cube_reference.add(construire_cube(df_lot), fill_value=0)
+            cube['nombre'] = cube['nombre'].astype(np.int64)
+
+        # 1. Statistiques et agrégat journaliers : seuls les jours présents dans le lot changent
+        stats_lot = statistiques_journalieres(df_lot)
+        if depot is None:
+            stats = additionner_statistiques(stats_reference, stats_lot)
+            df_historique, features = actualiser_historique(paquet.df_historique, stats, stats_lot.index)
+        else:
+            # SQLite : la base contient aussi les lots des autres workers, que ce processus n'a pas vus ;
+            # l'agrégat (une ligne par jour) est reconstruit sur ses statistiques
+            revision = depot.revision()
+            stats = additionner_statistiques(depot.statistiques_journalieres(), stats_lot)
+            df_historique, features = features_depuis_statistiques(stats)
+
+        # 2. Forêt complétée par de nouveaux arbres
+        debut = time.perf_counter()
+        model, std_error, reentrainement = completer_foret(paquet.model, df_historique, features, paquet.features)
+        duree_entrainement = time.perf_counter() - debut
+        # Le classement prévu (panel) est conservé jusqu'au prochain ré-entraînement complet
+        nouveau_paquet = construire_paquet(model, df_historique, features, std_error, model.feature_importances_,
+                                           duree_entrainement, paquet.panel)
+
+        if depot is not None:
+            # NOUVEAU : une transaction SQLite ; les agrégats sont recalculés par requête
+            depot.ajouter(df_lot)
+            # Un autre worker a écrit entre la lecture des statistiques et l'ajout : le modèle ne l'a pas vu
+            ecriture_concurrente = depot.revision() != revision + 1
+            dimensions = depot.dimensions()
+        # 3. Données d'abord, paquet ensuite : une requête qui voit le nouveau paquet voit les nouvelles données
+        with VERROU_ETAT:
+            if depot is None:
+                DF_COMPLET, CUBE = df_complet, cube
+                ALL_CATEGORIES = list(dict.fromkeys(ALL_CATEGORIES + df_lot['Categorie'].astype(str).unique().tolist()))
+                ALL_LIGNES = sorted(set(ALL_LIGNES) | set(df_lot['Ligne designer'].astype(str)))
+            else:
+                ALL_CATEGORIES, ALL_LIGNES = dimensions
+            STATS_JOURNALIERES = stats
+            installer_paquet(nouveau_paquet)
+        # Les modèles de segment dépendent des données
+        REGISTRE_SEGMENTS.vider()
+        if depot is not None and ecriture_concurrente:
+            PLANIFICATEUR.declencher()
+
+    return {
+        'evaluations': len(df_lot),
+        'jours_mis_a_jour': [jour.strftime('%Y-%m-%d') for jour in stats_lot.index],
+        'arbres': len(model.estimators_),
+        'reentrainement_complet': reentrainement,
+    }
+
+@tableau.route('/api/evaluations', methods=['POST'])
+def api_evaluations():
+    """Ingère un lot JSON d'évaluations au format long (liste, ou objet avec une clé 'evaluations')."""
+    donnees = request.get_json(silent=True)
+    if isinstance(donnees, dict):
+        donnees = donnees.get('evaluations')
+    if not isinstance(donnees, list) or not donnees:
+        return jsonify(erreur="Corps attendu : liste JSON d'évaluations non vide"), 400
+    try:
+        with METRIQUES.chrono('rh_etape_duree_secondes', etape='ingestion'):
+            resume = ingerer_evaluations(pd.DataFrame.from_records(donnees))
+    except ValueError as e:
+        return jsonify(erreur=str(e)), 400
+    except RuntimeError as e:
+        return jsonify(erreur=str(e)), 409
+    return jsonify(resume)
+
+# --- NOUVEAU : Version du modèle en service et ré-entraînement à la demande ---
+@tableau.route('/api/modele')
+def api_modele():
+    """Décrit le modèle en service (version, durée d'entraînement) et le planificateur."""
+    paquet = PAQUET
+    return jsonify(
+        version=paquet.version,
+        date_entrainement=paquet.date_entrainement.isoformat(timespec='seconds'),
+        duree_entrainement=round(paquet.duree_entrainement, 3),
+        arbres=len(paquet.model.estimators_),
+        features=list(paquet.features),
+        std_error=None if paquet.std_error is None else float(paquet.std_error),
+        panel=None if paquet.panel is None else {
+            'collaborateurs': len(paquet.panel.collaborateurs),
+            'duree_entrainement': round(paquet.panel.duree_entrainement, 3),
+            'importances': paquet.panel.importances,
+        },
+        planificateur=PLANIFICATEUR.statistiques(),
+    )
+
+@tableau.route('/api/modele/reentrainer', methods=['POST'])
+def api_reentrainer():
+    """Déclenche un ré-entraînement en arrière-plan ; le nouveau modèle remplacera l'actuel une fois prêt."""
+    PLANIFICATEUR.declencher()
+    return jsonify(statut='declenche', version=PAQUET.version), 202
+
+# --- NOUVEAU : Durée de chaque requête et exposition des métriques ---
+@tableau.before_app_request
+def demarrer_chrono():
+    g.debut_requete = time.perf_counter()
+
+# Routes servies même quand les données et le modèle ne sont pas encore prêts
+ROUTES_SANS_PREPARATION = {'tableau.healthz', 'tableau.readyz'}
+
+@tableau.before_app_request
+def exiger_preparation():
+    """Répond 503 tant que le modèle n'est pas prêt (en mode paresseux, le prépare d'abord)."""
+    if PREPARATION.prete or request.endpoint is None or request.endpoint in ROUTES_SANS_PREPARATION:
+        relancer_planificateur_apres_fork()
+        return None
+    if CONFIG['PREPARATION'] == 'paresseuse' and PREPARATION.executer():
+        return None
+    reponse = jsonify(PREPARATION.statistiques())
+    reponse.status_code = 503
+    reponse.headers['Retry-After'] = '1'
+    return reponse
+
+@tableau.route('/healthz')
+def healthz():
+    """Sonde de vie : le processus répond, sans dépendre des données ni du modèle."""
+    return jsonify(statut='ok')
+
+@tableau.route('/readyz')
+def readyz():
+    """Sonde de disponibilité : 200 quand le modèle est prêt, 503 sinon."""
+    return jsonify(PREPARATION.statistiques()), 200 if PREPARATION.prete else 503
+
+@tableau.after_app_request
+def enregistrer_duree(reponse):
+    debut = g.pop('debut_requete', None)
+    if debut is not None:
+        METRIQUES.observer('rh_requete_duree_secondes', time.perf_counter() - debut,
+                           route=request.endpoint or 'inconnue', statut=reponse.status_code)
+    return reponse
+
+@tableau.route('/metrics')
+def metrics():
+    """Expose chronos, caches, modèle et mémoire du processus au format texte de Prometheus."""
+    paquet = PAQUET
+    cache = CACHE_GRAPHIQUES.statistiques()
+    cache_agregats = CACHE_AGREGATS.statistiques()
+    segments = REGISTRE_SEGMENTS.statistiques()
+    rss, rss_max = memoire_processus()
+    compteurs = [
+        ('rh_cache_graphiques_succes_total', cache['succes'], {}),
+        ('rh_cache_graphiques_echecs_total', cache['echecs'], {}),
+        ('rh_cache_agregats_succes_total', cache_agregats['succes'], {}),
+        ('rh_cache_agregats_echecs_total', cache_agregats['echecs'], {}),
+        ('rh_segments_demandes_total', segments['demandes'], {}),
+    ]
+    jauges = [
+        ('rh_cache_graphiques_taux_succes', cache['taux_succes'], {}),
+        ('rh_cache_graphiques_entrees', cache['taille'], {}),
+        ('rh_cache_agregats_taux_succes', cache_agregats['taux_succes'], {}),
+        ('rh_segments_prets', segments['prets'], {}),
+        ('rh_segments_en_cours', segments['en_cours'], {}),
+        ('rh_segments_octets', segments['octets'], {}),
+        ('rh_modele_version', paquet.version, {}),
+        ('rh_modele_duree_entrainement_secondes', paquet.duree_entrainement, {}),
+        ('rh_modele_arbres', len(paquet.model.estimators_), {}),
+        ('rh_donnees_evaluations', len(DF_COMPLET), {}),
+        ('rh_processus_memoire_rss_octets', rss, {}),
+        ('rh_processus_memoire_rss_max_octets', rss_max, {}),
+    ]
+    return Response(METRIQUES.exporter(jauges, compteurs), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# --- NOUVEAU : Profilage à la demande (cProfile + piles échantillonnées pour flame graphs) ---
+COMPTEUR_REQUETES_PROFILAGE = itertools.count(1)
+COMPTEUR_PROFILS = itertools.count(1)
+
+class EchantillonneurPile(threading.Thread):
+    """Relève périodiquement la pile d'un thread et compte les piles au format « collapsed ».
+
+    Chaque ligne du fichier produit (`a;b;c 12`) est lisible par flamegraph.pl, speedscope, etc.
+    """
+
+    def __init__(self, ident_thread, intervalle):
+        super().__init__(name='profilage-echantillonneur', daemon=True)
+        self.ident_thread = ident_thread
+        self.intervalle = intervalle
+        self.piles = Counter()
+        self._arret = threading.Event()
+
+    def run(self):
+        while not self._arret.wait(self.intervalle):
+            frame = sys._current_frames().get(self.ident_thread)
+            pile = []
+            while frame is not None:
+                code = frame.f_code
+                pile.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}")
+                frame = frame.f_back
+            if pile:
+                self.piles[';'.join(reversed(pile))] += 1
+
+    def arreter(self):
+        self._arret.set()
+        self.join()
+
+def profilage_demande():
+    """Indique si la requête courante doit être profilée (`?_profile=1` autorisé, ou 1 requête sur N)."""
+    if CONFIG['PROFILAGE_PARAMETRE'] and request.args.get('_profile') == '1':
+        return True
+    echantillon = CONFIG['PROFILAGE_ECHANTILLON']
+    return echantillon > 0 and next(COMPTEUR_REQUETES_PROFILAGE) % echantillon == 0
+
+def enregistrer_profil(profileur, piles, requete, duree):
+    """Écrit le rapport (`.pstats`, `.folded`, `.json`) dans le dossier des profils et renvoie son identifiant."""
+    dossier = CONFIG['PROFILAGE_DIR']
+    os.makedirs(dossier, exist_ok=True)
+    identifiant = f"profil-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{next(COMPTEUR_PROFILS)}"
+    base = os.path.join(dossier, identifiant)
+    profileur.dump_stats(base + '.pstats')
+    with open(base + '.folded', 'w', encoding='utf-8') as f:
+        for pile, nombre in piles.most_common():
+            f.write(f"{pile} {nombre}\n")
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'identifiant': identifiant,
+            'requete': requete,
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'duree': duree,
+            'echantillons': sum(piles.values()),
+        }, f)
+    purger_profils(dossier, CONFIG['PROFILAGE_MAX'])
+    return identifiant
+
+def purger_profils(dossier, nb_max):
+    """Tampon circulaire : ne conserve que les `nb_max` rapports les plus récents."""
+    rapports = sorted(
+        (os.path.join(dossier, nom) for nom in os.listdir(dossier) if nom.endswith('.json')),
+        key=os.path.getmtime, reverse=True
+    )
+    for chemin in rapports[nb_max:]:
+        base = chemin[:-len('.json')]
+        for extension in ('.json', '.pstats', '.folded'):
+            if os.path.exists(base + extension):
+                os.remove(base + extension)
+
+def profilable(vue):
+    """Décorateur : exécute la vue sous cProfile (et l'échantillonneur de piles) quand c'est demandé.
+
+    L'identifiant du rapport est renvoyé dans l'en-tête `X-Profil`.
+    """
+    @wraps(vue)
+    def enveloppe(*args, **kwargs):
+        if not profilage_demande():
+            return vue(*args, **kwargs)
+        profileur = cProfile.Profile()
+        echantillonneur = EchantillonneurPile(threading.get_ident(), CONFIG['PROFILAGE_INTERVALLE_MS'] / 1000)
+        echantillonneur.start()
+        debut = time.perf_counter()
+        try:
+            reponse = profileur.runcall(vue, *args, **kwargs)
+        finally:
+            duree = time.perf_counter() - debut
+            echantillonneur.arreter()
+        reponse = current_app.make_response(reponse)
+        reponse.headers['X-Profil'] = enregistrer_profil(profileur, echantillonneur.piles, request.full_path, duree)
+        return reponse
+    return enveloppe
+
+def profilage_active():
+    return CONFIG['PROFILAGE_PARAMETRE'] or CONFIG['PROFILAGE_ECHANTILLON'] > 0
+
+@tableau.route('/api/profils')
+def api_profils():
+    """Liste les rapports de profilage conservés, du plus récent au plus ancien."""
+    if not profilage_active():
+        abort(404)
+    dossier = CONFIG['PROFILAGE_DIR']
+    rapports = []
+    if os.path.isdir(dossier):
+        for nom in os.listdir(dossier):
+            if nom.endswith('.json'):
+                with open(os.path.join(dossier, nom), encoding='utf-8') as f:
+                    rapports.append(json.load(f))
+    rapports.sort(key=lambda rapport: rapport['date'], reverse=True)
+    return jsonify(rapports)
+
+@tableau.route('/api/profils/<identifiant>/<type_rapport>')
+def api_profil(identifiant, type_rapport):
+    """Télécharge un rapport : `pstats` (binaire), `folded` (flame graph) ou `texte` (résumé pstats)."""
+    if not profilage_active() or type_rapport not in ('pstats', 'folded', 'texte'):
+        abort(404)
+    # L'identifiant ne doit désigner qu'un fichier du dossier des profils
+    if os.path.basename(identifiant) != identifiant or not identifiant.startswith('profil-'):
+        abort(404)
+    base = os.path.join(CONFIG['PROFILAGE_DIR'], identifiant)
+    if not os.path.exists(base + '.pstats'):
+        abort(404)
+    if type_rapport == 'pstats':
+        with open(base + '.pstats', 'rb') as f:
+            return Response(f.read(), mimetype='application/octet-stream')
+    if type_rapport == 'folded':
+        with open(base + '.folded', encoding='utf-8') as f:
+            return Response(f.read(), mimetype='text/plain')
+    sortie = io.StringIO()
+    pstats.Stats(base + '.pstats', stream=sortie).sort_stats('cumulative').print_stats(40)
+    return Response(sortie.getvalue(), mimetype='text/plain')
+
+# --- NOUVEAU : Graphiques d'exploration (position dans `agreger_depuis_cube`, titre, libellé de l'axe) ---
+GRAPHIQUES_EXPLORATION = {
+    'secteur': (1, 'Moyenne par Secteur', 'Secteur'),
+    'ligne': (2, 'Moyenne par Ligne', 'Ligne'),
+}
+
+def lire_filtres(paquet, args):
+    """Lit l'horizon (borné par le paquet lu par la requête) et les filtres ; une sélection vide vaut « tout »."""
+    jours_a_predire = paquet.prevision.borner(args.get('jours_a_predire', 14, type=int))
+    selected_categories = args.getlist('categories') or ALL_CATEGORIES
+    selected_lignes = args.getlist('lignes') or ALL_LIGNES
+    return jours_a_predire, selected_categories, selected_lignes
+
+def lire_periode(args):
+    """Lit `date_debut` / `date_fin` (AAAA-MM-JJ, incluses) ; une borne absente vaut None."""
+    bornes = []
+    for nom in ('date_debut', 'date_fin'):
+        valeur = args.get(nom) or None
+        if valeur is not None:
+            try:
+                valeur = pd.Timestamp(valeur).normalize()
+            except ValueError:
+                abort(400, description=f"{nom} invalide : {valeur!r} (AAAA-MM-JJ attendu)")
+        bornes.append(valeur)
+    return tuple(bornes)
+
+def revision_donnees(paquet):
+    """Révision des évaluations pour les clés de cache des agrégats.
+
+    En mémoire, les données ne changent qu'avec le paquet de ce processus : sa version suffit.
+    Avec SQLite, un autre worker peut ingérer sans que ce processus change de paquet : on lit
+    la révision enregistrée dans la base.
+    """
+    if isinstance(DF_COMPLET, DepotSQLite):
+        return 'sqlite', DF_COMPLET.revision()
+    return paquet.version
+
+def agregats_pour(paquet, categories, lignes, periode=(None, None)):
+    """Renvoie `agreger_depuis_cube` pour la sélection, mémorisé par révision des données et filtres.
+
+    Sans période, le cube global suffit ; avec une période, un cube est construit sur les
+    seules évaluations de la période (tranche de DF_COMPLET trié, puis masques).
+    """
+    cle = (revision_donnees(paquet), signature_filtres(categories, lignes), periode)
+    def calculer():
+        if isinstance(DF_COMPLET, DepotSQLite):
+            # NOUVEAU : filtres et sommes poussés dans SQLite (une requête groupée sur index)
+            return agreger_depuis_cube(DF_COMPLET.cube(categories, lignes, *periode), categories, lignes)
+        if periode == (None, None):
+            return agreger_depuis_cube(CUBE, categories, lignes)
+        return agreger_depuis_cube(construire_cube(filtrer_donnees(categories, lignes, *periode)), categories, lignes)
+    return CACHE_AGREGATS.obtenir_ou_calculer(cle, calculer)
+
+def parametres_periode(periode):
+    """Paramètres d'URL (ISO) d'une période, pour les liens vers /plot."""
+    return {nom: borne.strftime('%Y-%m-%d') for nom, borne in zip(('date_debut', 'date_fin'), periode) if borne is not None}
+
+def rendre_graphique(paquet, nom, format_image, jours_a_predire, categories, lignes, periode=(None, None)):
+    """Renvoie `(octets, etag)` du graphique demandé (depuis le cache LRU), ou None s'il est vide.
+
+    Les clés de cache portent la version du paquet (ou, pour les graphiques d'exploration, la
+    révision des données) : une requête qui a lu l'ancien paquet ne peut pas servir son image
+    aux requêtes qui voient le nouveau.
+    """
+    if nom == 'forecast':
+        prevision, statut, segment = prevision_pour(paquet, categories, lignes)
+        cle = (nom, paquet.version, format_image, jours_a_predire, segment if statut == RegistreSegments.PRET else None)
+        def fabrique():
+            return moteur_graphique(format_image).prevision(prevision.df_hist_plot, prevision.tranche(jours_a_predire), format_image)
+    elif nom == 'influencers':
+        cle = (nom, paquet.version, format_image)
+        def fabrique():
+            return generer_graphique_influenceurs(paquet.importances, paquet.features, format_image)
+    else:
+        position, titre, libelle = GRAPHIQUES_EXPLORATION[nom]
+        cle = (nom, revision_donnees(paquet), format_image, signature_filtres(categories, lignes), periode)
+        def fabrique():
+            moyennes = agregats_pour(paquet, categories, lignes, periode)[position]
+            return moteur_graphique(format_image).barres(moyennes, titre, libelle, 'Note Moyenne', format_image)
+
+    def fabrique_avec_etag():
+        # Chronométré seulement en cas d'échec du cache : c'est le coût réel d'un rendu
+        with METRIQUES.chrono('rh_etape_duree_secondes', etape='rendu_graphique', graphique=nom):
+            contenu = fabrique()
+        if contenu is None:
+            return None
+        # ETag fort : empreinte des octets exacts de l'image
+        return contenu, hashlib.sha1(contenu).hexdigest()
+
+    return CACHE_GRAPHIQUES.obtenir_ou_calculer(cle, fabrique_avec_etag)
+
+@tableau.route('/plot/<nom>')
+def plot(nom):
+    """Sert un graphique en image brute, avec ETag fort, Cache-Control et réponses 304."""
+    format_image = request.args.get('format', format_graphiques())
+    if format_image not in FORMATS_IMAGE or nom not in ('forecast', 'influencers', *GRAPHIQUES_EXPLORATION):
+        abort(404)
+    paquet = PAQUET
+    jours_a_predire, selected_categories, selected_lignes = lire_filtres(paquet, request.args)
+
+    image = rendre_graphique(paquet, nom, format_image, jours_a_predire, selected_categories, selected_lignes,
+                             lire_periode(request.args))
+    if image is None:
+        abort(404) # Aucune donnée pour ces filtres
+    contenu, etag = image
+
+    reponse = Response(contenu, mimetype=FORMATS_IMAGE[format_image])
+    reponse.set_etag(etag)
+    reponse.cache_control.public = True
+    if nom == 'influencers':
+        reponse.cache_control.max_age = CONFIG['PLOT_MAX_AGE_INFLUENCEURS']
+    else:
+        reponse.cache_control.max_age = CONFIG['PLOT_MAX_AGE']
+    return reponse.make_conditional(request)
+
+# --- NOUVEAU : API JSON (mêmes filtres que '/', sans aucun rendu graphique) ---
+def serie_en_records(serie, cle):
+    """Convertit une série de moyennes en `[{cle: nom, 'Note': moyenne}, ...]` (ordre conservé)."""
+    return [{cle: nom, 'Note': note} for nom, note in zip(serie.index.astype(str), serie.round(4).tolist())]
+
+@tableau.route('/api/forecast')
+def api_forecast():
+    """Prévision de l'horizon demandé, en colonnes (dates ISO, prédiction, bornes de l'intervalle)."""
+    paquet = PAQUET
+    jours_a_predire, selected_categories, selected_lignes = lire_filtres(paquet, request.args)
+    prevision, statut_segment, _ = prevision_pour(paquet, selected_categories, selected_lignes)
+    df_pred = prevision.tranche(jours_a_predire)
+    return jsonify(
+        version=paquet.version,
+        statut_segment=statut_segment,
+        jours_a_predire=jours_a_predire,
+        dates=df_pred['Date'].dt.strftime('%Y-%m-%d').tolist(),
+        prediction=df_pred['Prédiction'].round(4).tolist(),
+        limite_basse=df_pred['Limite_basse'].round(4).tolist(),
+        limite_haute=df_pred['Limite_haute'].round(4).tolist(),
+    )
+
+@tableau.route('/api/kpis')
+def api_kpis():
+    """KPIs du tableau de bord (note actuelle, prédiction J+7, tendance journalière)."""
+    paquet = PAQUET
+    jours_a_predire, selected_categories, selected_lignes = lire_filtres(paquet, request.args)
+    prevision, statut_segment, _ = prevision_pour(paquet, selected_categories, selected_lignes)
+    return jsonify(version=paquet.version, statut_segment=statut_segment,
+                   jours_a_predire=jours_a_predire, **prevision.kpis(jours_a_predire))
+
+@tableau.route('/api/leaderboard')
+def api_leaderboard():
+    """Meilleurs et moins bons collaborateurs de la sélection (`n`, 5 par défaut).
+
+    Avec le mode panel, `prevu` donne aussi le classement des notes moyennes prévues sur l'horizon.
+    """
+    paquet = PAQUET
+    jours_a_predire, selected_categories, selected_lignes = lire_filtres(paquet, request.args)
+    periode = lire_periode(request.args)
+    n = max(request.args.get('n', 5, type=int), 0)
+    moyennes_collab, _, _ = agregats_pour(paquet, selected_categories, selected_lignes, periode)
+    prevu = None
+    if paquet.panel is not None:
+        haut, bas = paquet.panel.classement(jours_a_predire, n, moyennes_collab.index)
+        prevu = {'jours_a_predire': jours_a_predire, 'top': haut, 'bottom': bas}
+    return jsonify(
+        collaborateurs=len(moyennes_collab),
+        periode=parametres_periode(periode),
+        top=serie_en_records(moyennes_collab.head(n), 'Collaborateur'),
+        bottom=serie_en_records(moyennes_collab.tail(n), 'Collaborateur') if n else [],
+        prevu=prevu,
+    )
+
+@tableau.route('/api/aggregates')
+def api_aggregates():
+    """Moyennes par secteur et par ligne de la sélection, et importances des features du modèle."""
+    paquet = PAQUET
+    _, selected_categories, selected_lignes = lire_filtres(paquet, request.args)
+    periode = lire_periode(request.args)
+    _, par_categorie, par_lignes = agregats_pour(paquet, selected_categories, selected_lignes, periode)
+    return jsonify(
+        version=paquet.version,
+        periode=parametres_periode(periode),
+        par_secteur=serie_en_records(par_categorie, 'Secteur'),
+        par_ligne=serie_en_records(par_lignes, 'Ligne'),
+        influenceurs=dict(zip(paquet.features, np.round(paquet.importances, 4).tolist())),
+    )
+
+@tableau.route('/')
+@profilable # NOUVEAU : profilage à la demande (?_profile=1 ou 1 requête sur N)
 def index():
     # --- Collecte des paramètres de l'URL (le "request") ---
-    jours_a_predire = request.args.get('jours_a_predire', 14, type=int)
-    selected_categories = request.args.getlist('categories')
-    selected_lignes = request.args.getlist('lignes') # NOUVEAU
+    paquet = PAQUET # NOUVEAU : un seul paquet (modèle + historique) pour toute la requête
+    with METRIQUES.chrono('rh_etape_duree_secondes', etape='filtres'):
+        jours_a_predire, selected_categories, selected_lignes = lire_filtres(paquet, request.args)
+        periode = lire_periode(request.args) # NOUVEAU : date_debut / date_fin
 
     # --- Exécution de la logique ---
-    if not selected_categories:
-        selected_categories = ALL_CATEGORIES
-    if not selected_lignes:
-        selected_lignes = ALL_LIGNES
-        
-    # NOUVEAU : Filtrage combiné
-    df_filtre = DF_COMPLET[
-        (DF_COMPLET['Categorie'].isin(selected_categories)) &
-        (DF_COMPLET['Ligne designer'].isin(selected_lignes))
-    ]
+    # NOUVEAU : Agrégats de la sélection lus dans le cube pré-calculé (plus de parcours des lignes)
+    with METRIQUES.chrono('rh_etape_duree_secondes', etape='agregats'):
+        moyennes_collab, _, _ = agregats_pour(paquet, selected_categories, selected_lignes, periode)
     
-    # --- Génération des prévisions avec RandomForest ---
-    df_pred, df_hist_plot = predire_rf(MODELE, DF_HISTORIQUE, FEATURES, STD_ERROR, jours_a_predire)
+    # --- Prévisions RandomForest : tranche de la table pré-calculée ---
+    # NOUVEAU : modèle du segment filtré s'il est prêt, sinon modèle global (jamais d'attente)
+    with METRIQUES.chrono('rh_etape_duree_secondes', etape='prevision'):
+        prevision, statut_segment, _ = prevision_pour(paquet, selected_categories, selected_lignes)
+        df_pred = prevision.tranche(jours_a_predire)
 
     # --- Calcul des KPIs ---
-    note_actuelle = f"{DF_HISTORIQUE['Note'].iloc[-1]:.2f}"
-    pred_j7 = f"{df_pred['Prédiction'].iloc[min(6, len(df_pred)-1)]:.2f}"
-    trend_start = df_pred['Prédiction'].iloc[0]
-    trend_end = df_pred['Prédiction'].iloc[-1]
-    tendance_val = (trend_end - trend_start) / jours_a_predire
+    with METRIQUES.chrono('rh_etape_duree_secondes', etape='kpis'):
+        kpis = prevision.kpis(jours_a_predire)
+    note_actuelle = f"{kpis['note_actuelle']:.2f}"
+    pred_j7 = f"{kpis['pred_j7']:.2f}"
+    tendance_val = kpis['tendance_val']
     tendance_emoji = "📈" if tendance_val > 0 else "📉"
 
+    # --- NOUVEAU : Les graphiques sont servis par /plot/<nom> ---
+    # Les URLs ne portent que les paramètres dont dépend chaque graphique,
+    # normalisés, pour maximiser les réutilisations du cache navigateur.
+    format_image = format_graphiques()
+    filtres_url = {
+        'categories': sorted(set(request.args.getlist('categories'))),
+        'lignes': sorted(set(request.args.getlist('lignes'))),
+        **parametres_periode(periode),
+    }
+    # La prévision ne dépend pas de la période : seuls secteurs et lignes lui sont transmis
+    filtres_prevision = ({'categories': filtres_url['categories'], 'lignes': filtres_url['lignes']}
+                         if CONFIG['SEGMENTS_MODE'] != 'aucun' else {})
+    plot_url = url_for('.plot', nom='forecast', format=format_image, jours_a_predire=jours_a_predire, **filtres_prevision)
+
     # --- Calcul des graphiques d'exploration ---
-    if not df_filtre.empty:
-        moyennes_collab = df_filtre.groupby('Collaborateur')['Note'].mean().sort_values(ascending=False)
+    if not moyennes_collab.empty:
         top_5 = moyennes_collab.head(5).reset_index().to_dict('records')
         bottom_5 = moyennes_collab.tail(5).reset_index().to_dict('records')
         
-        # NOUVEAU : Génération des graphiques
-        moyennes_par_categorie = df_filtre.groupby('Categorie')['Note'].mean().sort_values(ascending=False)
-        moyennes_par_lignes = df_filtre.groupby('Ligne designer')['Note'].mean().sort_values(ascending=False)
-        
-        plot_cat_base64 = generer_barplot_base64(moyennes_par_categorie, 'Moyenne par Secteur', 'Secteur', 'Note Moyenne')
-        plot_ligne_base64 = generer_barplot_base64(moyennes_par_lignes, 'Moyenne par Ligne', 'Ligne', 'Note Moyenne')
+        plot_cat_url = url_for('.plot', nom='secteur', format=format_image, **filtres_url)
+        plot_ligne_url = url_for('.plot', nom='ligne', format=format_image, **filtres_url)
 
     else:
         top_5, bottom_5 = [], []
-        plot_cat_base64, plot_ligne_base64 = None, None
+        plot_cat_url, plot_ligne_url = None, None
+
+    # --- NOUVEAU : Classement prévu par le modèle panel (sélection partielle, sans tri complet) ---
+    top_5_prevu, bottom_5_prevu = [], []
+    if paquet.panel is not None:
+        with METRIQUES.chrono('rh_etape_duree_secondes', etape='classement_prevu'):
+            top_5_prevu, bottom_5_prevu = paquet.panel.classement(jours_a_predire, 5, moyennes_collab.index)
 
-    # --- NOUVEAU : Génération du graphique des Key Influencers ---
+    # --- NOUVEAU : Graphique des Key Influencers ---
+    # Il ne dépend que du modèle : son ETag sert de version dans l'URL, ce qui permet
+    # une longue durée de cache côté client tout en changeant d'URL à chaque ré-entraînement.
     try:
-        # Traduction des noms techniques des features
-        feature_name_map = {
-            'jours_total': 'Tendance (Jours)',
-            'jour_de_la_semaine': 'Jour de la semaine',
-            'jour_du_mois': 'Jour du mois',
-            'mois': 'Mois de l\'année',
-            'jour_de_l_annee': 'Jour de l\'année',
-            'pct_Maintenance': 'Influence Maintenance', # NOUVEAU
-            'pct_Production': 'Influence Production',   # NOUVEAU
-            'pct_Qualité': 'Influence Qualité',         # NOUVEAU
-            'pct_Méthode': 'Influence Méthode'          # NOUVEAU
-        }
-        importances_series = pd.Series(FEATURE_IMPORTANCES, index=FEATURES)
-        importances_series.index = importances_series.index.map(lambda x: feature_name_map.get(x, x))
-        importances_series = importances_series.sort_values(ascending=False)
-        
-        plot_influencers_base64 = generer_barplot_base64(
-            importances_series, 
-            'Importance des Facteurs Clés', 
-            'Facteur', 
-            'Importance (Score)'
-        )
+        with METRIQUES.chrono('rh_etape_duree_secondes', etape='graphique_influenceurs'):
+            _, etag_influencers = rendre_graphique(paquet, 'influencers', format_image, jours_a_predire, selected_categories, selected_lignes)
+        plot_influencers_url = url_for('.plot', nom='influencers', format=format_image, v=etag_influencers[:12])
     except Exception as e:
         print(f"Erreur lors de la génération du graphique des influenceurs : {e}")
-        plot_influencers_base64 = None
-
-    # --- Génération du Graphique de Prévision (Matplotlib) ---
-    fig, ax = plt.subplots(figsize=(12, 6))
-    ax.plot(df_hist_plot['Date'], df_hist_plot['Note_hist'], 'o-', label='Données historiques', color='blue', linewidth=2, markersize=4)
-    ax.plot(df_pred['Date'], df_pred['Prédiction'], 's-', label='Prédictions', color='red', linewidth=2, markersize=4)
-    ax.fill_between(df_pred['Date'], 
-                    df_pred['Limite_basse'], 
-                    df_pred['Limite_haute'], 
-                    alpha=0.2, color='red', label='Intervalle de confiance 95%')
-    ax.set_xlabel('Date', fontsize=12)
-    ax.set_ylabel('Note moyenne', fontsize=12)
-    ax.set_title('Évolution et Prévision des Notes (Modèle RandomForest)', fontsize=14, fontweight='bold')
-    ax.legend()
-    ax.grid(True, alpha=0.3)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', bbox_inches='tight')
-    plt.close(fig)
-    plot_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
+        plot_influencers_url = None
 
     df_pred_table = df_pred.to_dict('records') # Convertir en dict pour le template
 
     # --- Rendu de la page ---
-    return render_template_string(
-        HTML_TEMPLATE,
-        jours_a_predire=jours_a_predire,
-        all_categories=ALL_CATEGORIES,
-        selected_categories=selected_categories,
-        all_lignes=ALL_LIGNES, # NOUVEAU
-        selected_lignes=selected_lignes, # NOUVEAU
-        note_actuelle=note_actuelle,
-        pred_j7=pred_j7,
-        tendance_val=tendance_val,
-        tendance_emoji=tendance_emoji,
-        predictions=df_pred_table, # MIS A JOUR
-        plot_base64=plot_base64,
-        plot_cat_base64=plot_cat_base64, # NOUVEAU
-        plot_ligne_base64=plot_ligne_base64, # NOUVEAU
-        plot_influencers_base64=plot_influencers_base64, # NOUVEAU
-        top_5=top_5,
-        bottom_5=bottom_5
-    )
+    with METRIQUES.chrono('rh_etape_duree_secondes', etape='rendu_template'):
+        return render_template_string(
+            HTML_TEMPLATE,
+            jours_a_predire=jours_a_predire,
+            all_categories=ALL_CATEGORIES,
+            selected_categories=selected_categories,
+            all_lignes=ALL_LIGNES, # NOUVEAU
+            selected_lignes=selected_lignes, # NOUVEAU
+            periode=parametres_periode(periode), # NOUVEAU
+            date_min=STATS_JOURNALIERES.index.min().strftime('%Y-%m-%d'), # NOUVEAU
+            date_max=STATS_JOURNALIERES.index.max().strftime('%Y-%m-%d'), # NOUVEAU
+            note_actuelle=note_actuelle,
+            pred_j7=pred_j7,
+            tendance_val=tendance_val,
+            tendance_emoji=tendance_emoji,
+            predictions=df_pred_table, # MIS A JOUR
+            plot_url=plot_url,
+            plot_cat_url=plot_cat_url, # NOUVEAU
+            plot_ligne_url=plot_ligne_url, # NOUVEAU
+            plot_influencers_url=plot_influencers_url, # NOUVEAU
+            top_5=top_5,
+            bottom_5=bottom_5,
+            top_5_prevu=top_5_prevu, # NOUVEAU
+            bottom_5_prevu=bottom_5_prevu, # NOUVEAU
+            statut_segment=statut_segment
+        )
+
+# --- NOUVEAU : Fabrique de l'application et application par défaut (WSGI) ---
+def create_app(config=None):
+    """Crée l'application Flask ; `config` surcharge les clés de CONFIG.
+
+    La préparation des données et du modèle suit CONFIG['PREPARATION'] : 'arriere_plan' (par
+    défaut, dans un thread ; /readyz répond 503 jusqu'à la fin), 'immediate' (avant de rendre
+    la main) ou 'paresseuse' (à la première requête qui en a besoin). /healthz répond dans tous les cas.
+    """
+    CONFIG.update(config or {})
+    if CONFIG['PREPARATION'] not in MODES_PREPARATION:
+        raise ValueError(f"Mode de préparation inconnu : {CONFIG['PREPARATION']!r} (attendu : {', '.join(MODES_PREPARATION)})")
+    if PREPARATION.statut == Preparation.EN_ATTENTE:
+        construire_services()
+
+    app = Flask(__name__)
+    app.register_blueprint(tableau)
+    if CONFIG['PREPARATION'] == 'immediate':
+        if not PREPARATION.executer():
+            raise RuntimeError(f"Préparation du modèle impossible : {PREPARATION.erreur}")
+    elif CONFIG['PREPARATION'] == 'arriere_plan':
+        PREPARATION.lancer_en_arriere_plan()
+    return app
+
+APP_PAR_DEFAUT = None
+VERROU_APP = threading.Lock()
+
+def __getattr__(nom):
+    """`interface_projet_filmod.app` (ex. `gunicorn interface_projet_filmod:app`) : créée au premier accès."""
+    global APP_PAR_DEFAUT
+    if nom != 'app':
+        raise AttributeError(f"module {__name__!r} has no attribute {nom!r}")
+    with VERROU_APP:
+        if APP_PAR_DEFAUT is None:
+            APP_PAR_DEFAUT = create_app()
+    return APP_PAR_DEFAUT
 
 # --- 5. Lancement de l'application ---
 if __name__ == '__main__':
-    print("--- Démarrage du serveur Flask ---")
-    print("Ouvrez http://127.0.0.1:5000 dans votre navigateur.")
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    if '--backtest' in sys.argv:
+        # NOUVEAU : python interface_projet_filmod.py --backtest
+        executer_backtest()
+    else:
+        print("--- Démarrage du serveur Flask ---")
+        print("Ouvrez http://127.0.0.1:5000 dans votre navigateur.")
+        create_app().run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Le dépôt tient en un seul module, à la racine : il est importé tel quel par les tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def evaluations():
+    """Fabrique de petits jeux d'évaluations au format long, comme après `depivoter_bloc`."""
+    def fabriquer(nb=600, graine=0):
+        aleatoire = np.random.default_rng(graine)
+        dates = pd.Timestamp('2025-01-01') + pd.to_timedelta(aleatoire.integers(0, 60, nb), unit='D')
+        return pd.DataFrame({
+            "Sélectionnez la date de l'évaluation.": dates,
+            'Ligne designer': aleatoire.choice(['ligne 1', 'ligne 2', 'ligne 3'], nb),
+            'Collaborateur': aleatoire.choice(['Adil', 'Badr', 'Sara', 'Youssef', 'Imane'], nb),
+            'Categorie': aleatoire.choice(['Maintenance', 'Production', 'Qualité'], nb),
+            'Note': aleatoire.integers(1, 6, nb).astype(np.float64),
+        })
+    return fabriquer
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Artefacts persistés : réutilisation par clé et purge par type d'artefact."""
+import numpy as np
+import pytest
+
+import interface_projet_filmod as rh
+
+
+def test_panel_recharge_depuis_son_artefact(tmp_path, monkeypatch, evaluations):
+    monkeypatch.setitem(rh.CONFIG, 'ARTEFACTS_DIR', str(tmp_path))
+    monkeypatch.setitem(rh.HYPERPARAMETRES_PANEL, 'n_estimators', 10)
+    df = evaluations()
+
+    entraine = rh.charger_ou_entrainer_panel(df, 7)
+    monkeypatch.setattr(rh.PrevisionPanel, 'entrainer', classmethod(lambda cls, *args: pytest.fail("panel ré-entraîné")))
+    recharge = rh.charger_ou_entrainer_panel(df, 7)
+
+    assert isinstance(recharge.cumul, np.memmap)
+    np.testing.assert_allclose(recharge.cumul, entraine.cumul)
+    assert recharge.classement(7, 2) == entraine.classement(7, 2)
+    assert recharge.importances == entraine.importances
+
+
+def test_purge_par_type_d_artefact(tmp_path, monkeypatch):
+    monkeypatch.setitem(rh.CONFIG, 'ARTEFACTS_MAX', 1)
+    for nom in ('modele-a', 'panel-a', 'panel-b'):
+        rh.ecrire_artefact(str(tmp_path / f"{nom}.joblib"), {'cle': nom})
+
+    assert sorted(chemin.name for chemin in tmp_path.iterdir()) == ['modele-a.joblib', 'panel-b.joblib']
+
+
+def test_entrainement_avec_les_hyperparametres_du_backtest(tmp_path, monkeypatch, evaluations):
+    monkeypatch.setitem(rh.CONFIG, 'ARTEFACTS_DIR', str(tmp_path))
+    (tmp_path / 'hyperparametres.json').write_text('{"hyperparametres": {"n_estimators": 12}}', encoding='utf-8')
+
+    model, *_ = rh.entrainer_modele(evaluations())
+
+    assert len(model.estimators_) == 12
+    assert model.min_samples_leaf == rh.HYPERPARAMETRES_RF['min_samples_leaf']
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""Calculs vectorisés comparés à leur version de référence (scikit-learn, pandas en une passe)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import interface_projet_filmod as rh
+
+COLONNE_DATE = "Sélectionnez la date de l'évaluation."
+
+
+def test_foret_compacte_egale_predict_de_scikit_learn():
+    from sklearn.ensemble import RandomForestRegressor
+    aleatoire = np.random.default_rng(1)
+    X = aleatoire.normal(size=(300, 6))
+    y = X[:, 0] * 2 - X[:, 3] + aleatoire.normal(scale=0.1, size=300)
+    model = RandomForestRegressor(n_estimators=20, min_samples_leaf=2, random_state=0).fit(X, y)
+    X_test = aleatoire.normal(size=(90, 6))
+
+    foret = rh.ForetCompacte(model)
+
+    np.testing.assert_allclose(foret.predict(X_test), model.predict(X_test))
+    par_arbre = np.column_stack([arbre.predict(X_test) for arbre in model.estimators_])
+    np.testing.assert_allclose(foret.predictions_par_arbre(X_test), par_arbre)
+    np.testing.assert_allclose(foret.descendre(foret.suivants(X_test[0])), par_arbre[0])
+
+
+@pytest.mark.parametrize('taille_bloc', [1, 7, 250, 10_000])
+def test_statistiques_par_blocs_egales_une_passe(taille_bloc, evaluations):
+    df = evaluations()
+
+    par_blocs = rh.statistiques_par_blocs(rh.blocs_depuis_dataframe(df, taille_bloc))
+
+    pd.testing.assert_frame_equal(par_blocs, rh.statistiques_journalieres(df), check_dtype=False, check_freq=False)
+
+
+def test_statistiques_par_blocs_sans_bloc():
+    with pytest.raises(ValueError):
+        rh.statistiques_par_blocs(iter(()))
+
+
+def test_cube_egal_aux_moyennes_des_evaluations_filtrees(monkeypatch, evaluations):
+    df = rh.trier_par_date(evaluations())
+    monkeypatch.setattr(rh, 'DF_COMPLET', df, raising=False)
+    categories, lignes = ['Maintenance', 'Qualité'], ['ligne 1', 'ligne 3']
+
+    collab, secteurs, lignes_moyennes = rh.agreger_depuis_cube(rh.construire_cube(df), categories, lignes)
+
+    filtrees = rh.filtrer_donnees(categories, lignes)
+    for obtenu, niveau in ((collab, 'Collaborateur'), (secteurs, 'Categorie'), (lignes_moyennes, 'Ligne designer')):
+        attendu = filtrees.groupby(niveau)['Note'].mean().sort_values(ascending=False)
+        pd.testing.assert_series_equal(obtenu, attendu.rename('Note'), check_names=False)
+        assert list(obtenu.index) == list(attendu.index), niveau
+
+
+def test_features_decalees_a_la_main():
+    colonnes = rh.features_decalees([2.0, 4.0, 3.0, 5.0])
+
+    np.testing.assert_allclose(colonnes['note_j-1'], [2, 2, 4, 3])
+    np.testing.assert_allclose(colonnes['note_j-7'], [2, 2, 2, 2])
+    # Le premier jour reprend sa propre note, puis la moyenne porte sur les jours précédents
+    np.testing.assert_allclose(colonnes['moyenne_7j'], [2, 2, 8 / 3, 11 / 4])
+    np.testing.assert_allclose(colonnes['volatilite_7j'], [0, 0, np.std([2, 2, 4]), np.std([2, 2, 4, 3])])
+    np.testing.assert_allclose(colonnes['moyenne_28j'], colonnes['moyenne_7j'])
+
+
+def test_features_panel_a_la_main():
+    jour = pd.Timestamp('2025-03-01')
+    panel = pd.DataFrame({
+        'Collaborateur': ['Adil', 'Adil', 'Adil', 'Sara', 'Sara'],
+        COLONNE_DATE: [jour, jour + pd.Timedelta(days=2), jour + pd.Timedelta(days=5), jour, jour + pd.Timedelta(days=1)],
+        'somme_notes': [8.0, 3.0, 10.0, 5.0, 2.0],
+        'nombre_notes': [2, 1, 2, 1, 2],
+    })
+    a_priori = 28 / 8
+
+    X, y, poids, etat = rh.features_panel(panel, jour)
+    colonne = dict(zip(rh.FEATURES_PANEL, X.T))
+
+    np.testing.assert_allclose(y, [4, 3, 5, 5, 1])
+    np.testing.assert_allclose(poids, [2, 1, 2, 1, 2])
+    np.testing.assert_allclose(colonne['code_collaborateur'], [0, 0, 0, 1, 1])
+    np.testing.assert_allclose(colonne['moyenne_passee'], [a_priori, 4, 11 / 3, a_priori, 5])
+    np.testing.assert_allclose(colonne['nb_evaluations_passees'], [0, 2, 3, 0, 1])
+    np.testing.assert_allclose(colonne['derniere_note'], [a_priori, 4, 3, a_priori, 5])
+    np.testing.assert_allclose(colonne['jours_depuis_derniere'], [0, 2, 3, 0, 1])
+    np.testing.assert_allclose(colonne['jours_total'], [0, 2, 5, 0, 1])
+    assert list(etat['collaborateurs']) == ['Adil', 'Sara']
+    np.testing.assert_allclose(etat['moyenne'], [21 / 5, 7 / 3])
+    np.testing.assert_allclose(etat['derniere_note'], [5, 1])
+    np.testing.assert_allclose(etat['dernier_jour'], [5, 1])
+
+
+def test_features_decalees_en_jours_calendaires():
+    # Jours 0, 1, 3 et 4 : le jour 2 sans évaluation reprend la note du jour 1
+    df_agg = pd.DataFrame({'jours_total': [0, 1, 3, 4], 'Note': [2.0, 4.0, 3.0, 5.0]})
+
+    calendrier, positions = rh.notes_calendaires(df_agg['jours_total'], df_agg['Note'])
+    rh.ajouter_features_decalees(df_agg)
+
+    np.testing.assert_allclose(calendrier, [2, 4, 4, 3, 5])
+    np.testing.assert_array_equal(positions, [0, 1, 3, 4])
+    np.testing.assert_allclose(df_agg['note_j-1'], [2, 2, 4, 3])
+    np.testing.assert_allclose(df_agg['moyenne_7j'], [2, 2, 12 / 4, 15 / 5])
+
+
+class ForetOracle:
+    """Forêt à un arbre qui « prédit » les notes réelles, pour rejouer la récursion sur l'historique."""
+    racines = np.zeros(1, dtype=np.intp)
+
+    def __init__(self, notes):
+        self.notes = iter(notes)
+
+    def suivants(self, x):
+        return x
+
+    def descendre(self, suivants):
+        return np.array([next(self.notes)])
+
+
+def test_prevision_recursive_reconstruit_les_features_d_entrainement(monkeypatch, evaluations):
+    monkeypatch.setitem(rh.CONFIG, 'FEATURES_DECALEES', True)
+    df = evaluations(nb=400)
+    df = df[~df[COLONNE_DATE].isin(pd.to_datetime(['2025-01-20', '2025-01-21', '2025-02-03']))]
+    df_agg, features = rh.features_depuis_statistiques(rh.statistiques_journalieres(df))
+    X = df_agg[features].to_numpy(dtype=np.float64)
+    jours, notes = df_agg['jours_total'].to_numpy(), df_agg['Note'].to_numpy()
+    indices_decales = {col: features.index(col) for col in rh.COLONNES_DECALEES}
+    origine = 30  # Au-delà de la plus longue fenêtre, comme les origines du backtest
+
+    X_futur = X[origine:].copy()
+    X_futur[:, list(indices_decales.values())] = 0.0
+    notes_passees, _ = rh.notes_calendaires(jours[:origine], notes[:origine])
+    rh.prevoir_recursif(ForetOracle(notes[origine:]), X_futur, indices_decales, notes_passees,
+                        np.diff(jours[origine - 1:]))
+
+    assert (np.diff(jours[origine - 1:]) > 1).any()
+    np.testing.assert_allclose(X_futur, X[origine:])
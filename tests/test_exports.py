@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Aller-retour des exports CSV / Excel par le cache Parquet partitionné."""
+import csv
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+import pandas as pd
+
+import interface_projet_filmod as rh
+
+COLONNE_DATE = "Sélectionnez la date de l'évaluation."
+ENTETE = rh.COLONNES_IDENTIFIANTS + ['Horodateur', 'Enfilage du fil', 'Réglage de la tension du fil']
+# Blocs de 2 lignes : notes entières dans le premier, décimale dans le deuxième, et des
+# modalités (ligne, collaborateur) qui n'apparaissent que dans les blocs suivants
+LIGNES = [
+    ['01/06/2025', 'ligne 1', 'Collaborateur actif', 'A', '1 taches', 'Adil', '2025-06-01 08:00', '3', '4'],
+    ['02/06/2025', 'ligne 2', 'En formation', 'B', '2 taches', 'Badr', '2025-06-02 08:00', '5', '2'],
+    ['03/06/2025', 'ligne 3', 'En formation', 'C', '3 taches', 'Sara', '2025-06-03 08:00', '2.5', '4'],
+    ['15/07/2025', 'ligne 9', 'Collaborateur actif', 'D', '1 taches', 'Youssef', '2025-07-15 08:00', '1', '3'],
+    ['16/07/2025', 'ligne 1', 'Collaborateur actif', 'E', '2 taches', 'Adil', '2025-07-16 08:00', '4', ''],
+]
+TRI = [COLONNE_DATE, 'Collaborateur', 'Compétence', 'Categorie']
+
+
+def ecrire_csv(chemin):
+    with open(chemin, 'w', newline='', encoding='utf-8') as f:
+        ecrivain = csv.writer(f, delimiter=';')
+        ecrivain.writerow(ENTETE)
+        ecrivain.writerows(LIGNES)
+
+
+def ecrire_xlsx(chemin):
+    openpyxl = pytest.importorskip('openpyxl')
+    classeur = openpyxl.Workbook()
+    feuille = classeur.active
+    feuille.append(ENTETE)
+    for ligne in LIGNES:
+        feuille.append(ligne[:7] + [float(note) if note else None for note in ligne[7:]])
+    classeur.save(chemin)
+
+
+def en_une_passe(categorie):
+    """Référence : tout l'export dépivoté en un seul bloc, sans passer par Parquet."""
+    df_brut = pd.DataFrame(LIGNES, columns=ENTETE)
+    return rh.depivoter_bloc(df_brut.replace('', None), categorie)
+
+
+def comparable(df):
+    df = df.astype({col: str for col in rh.COLONNES_DIMENSIONS})
+    return df[rh.COLONNES_EVALUATION].sort_values(TRI, ignore_index=True)
+
+
+def test_charger_exports_relit_les_blocs_depuis_le_cache(tmp_path, monkeypatch):
+    ecrire_csv(tmp_path / 'maintenance.csv')
+    specification = f"Maintenance={tmp_path / 'maintenance.csv'}"
+    dossier = str(tmp_path / 'cache')
+
+    df = rh.charger_exports(specification, dossier=dossier, taille_bloc=2)
+
+    assert len(df) == 9  # 5 évaluations x 2 compétences, moins la note vide
+    assert df['Note'].dtype == 'float64'
+    for col in rh.COLONNES_DIMENSIONS:
+        assert isinstance(df[col].dtype, pd.CategoricalDtype), col
+    pd.testing.assert_frame_equal(comparable(df), comparable(en_une_passe('Maintenance')))
+
+    # Exports inchangés : le cache est relu sans reconstruction
+    monkeypatch.setattr(rh, 'construire_cache_exports', lambda *args: pytest.fail("cache reconstruit"))
+    pd.testing.assert_frame_equal(comparable(rh.charger_exports(specification, dossier=dossier, taille_bloc=2)),
+                                  comparable(df))
+
+
+def test_charger_exports_csv_et_excel(tmp_path):
+    ecrire_csv(tmp_path / 'maintenance.csv')
+    ecrire_xlsx(tmp_path / 'qualite.xlsx')
+    specification = f"Maintenance={tmp_path / 'maintenance.csv'};Qualité={tmp_path / 'qualite.xlsx'}"
+
+    df = rh.charger_exports(specification, dossier=str(tmp_path / 'cache'), taille_bloc=2)
+
+    attendu = pd.concat([en_une_passe('Maintenance'), en_une_passe('Qualité')], ignore_index=True)
+    pd.testing.assert_frame_equal(comparable(df), comparable(attendu))
+    assert sorted(df['Categorie'].cat.categories) == ['Maintenance', 'Qualité']
+
+
+def test_statistiques_par_blocs_des_exports(tmp_path):
+    ecrire_csv(tmp_path / 'maintenance.csv')
+    ecrire_csv(tmp_path / 'production.csv')
+    specification = f"Maintenance={tmp_path / 'maintenance.csv'};Production={tmp_path / 'production.csv'}"
+    dossier = str(tmp_path / 'cache')
+
+    # Sans cache : blocs dépivotés directement depuis les CSV ; puis depuis les lots Parquet
+    directes = rh.statistiques_par_blocs(rh.blocs_exports(specification, dossier=dossier, taille_bloc=2))
+    rh.preparer_cache_exports(specification, dossier=dossier, taille_bloc=2)
+    depuis_cache = rh.statistiques_par_blocs(rh.blocs_exports(specification, dossier=dossier, taille_bloc=2))
+
+    attendues = rh.statistiques_journalieres(rh.charger_exports(specification, dossier=dossier))
+    pd.testing.assert_frame_equal(directes, attendues, check_dtype=False, check_freq=False)
+    pd.testing.assert_frame_equal(depuis_cache, attendues, check_dtype=False, check_freq=False)
+
+
+def test_dates_avec_heure_ramenees_au_jour(tmp_path):
+    with open(tmp_path / 'maintenance.csv', 'w', newline='', encoding='utf-8') as f:
+        ecrivain = csv.writer(f, delimiter=';')
+        ecrivain.writerow(ENTETE)
+        ecrivain.writerow(['01/06/2025 08:15', 'ligne 1', 'Collaborateur actif', 'A', '1 taches', 'Adil', '', '3', '4'])
+        ecrivain.writerow(['01/06/2025 17:40', 'ligne 1', 'Collaborateur actif', 'B', '1 taches', 'Sara', '', '5', '2'])
+    specification = f"Maintenance={tmp_path / 'maintenance.csv'}"
+
+    df = rh.charger_exports(specification, dossier=str(tmp_path / 'cache'), taille_bloc=1)
+
+    assert df[COLONNE_DATE].unique().tolist() == [pd.Timestamp('2025-06-01')]
+    stats = rh.statistiques_journalieres(df)
+    assert stats.index.tolist() == [pd.Timestamp('2025-06-01')]
+    assert stats['nombre_notes'].tolist() == [4]
+    assert rh.construire_cube(df)['nombre'].sum() == 4
+
+
+def test_sqlite_rempli_par_blocs_sans_charger_les_exports(tmp_path, monkeypatch):
+    ecrire_csv(tmp_path / 'maintenance.csv')
+    specification = f"Maintenance={tmp_path / 'maintenance.csv'}"
+    for cle, valeur in (('EXPORTS', specification), ('EXPORTS_CACHE_DIR', str(tmp_path / 'cache')),
+                        ('EXPORTS_TAILLE_BLOC', 2), ('ARTEFACTS_DIR', '')):
+        monkeypatch.setitem(rh.CONFIG, cle, valeur)
+    attendues = rh.statistiques_journalieres(en_une_passe('Maintenance'))
+    monkeypatch.setattr(rh, 'charger_exports', lambda *args, **kwargs: pytest.fail("exports chargés en entier"))
+
+    depot = rh.charger_depot_sqlite(str(tmp_path / 'rh.db'))
+
+    assert len(depot) == 9
+    pd.testing.assert_frame_equal(depot.statistiques_journalieres(), attendues, check_dtype=False, check_freq=False)
+    assert sorted(set(depot.evaluations(['Maintenance'], ['ligne 1'])['Collaborateur'])) == ['Adil']
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""Validation des lots ingérés (POST /api/evaluations)."""
+import pandas as pd
+import pytest
+
+import interface_projet_filmod as rh
+
+COLONNE_DATE = "Sélectionnez la date de l'évaluation."
+
+
+def lot(dates):
+    return pd.DataFrame({
+        COLONNE_DATE: dates,
+        'Ligne designer': 'ligne 1',
+        'Etat du personnel': 'Collaborateur actif',
+        'Article': 'A',
+        'Polyvalence': '1 taches',
+        'Collaborateur': 'Adil',
+        'Compétence': 'Enfilage du fil',
+        'Note': 4,
+        'Categorie': 'Maintenance',
+    })
+
+
+def test_dates_du_lot_ramenees_au_jour_sans_fuseau():
+    df = rh.preparer_lot(lot(['2025-11-04', '2025-11-04T10:30:00', '2025-11-06T09:00:00Z',
+                              '2025-11-06T01:00:00+02:00', 'pas une date']))
+
+    assert df[COLONNE_DATE].dt.tz is None
+    assert df[COLONNE_DATE].tolist() == pd.to_datetime(['2025-11-04', '2025-11-04', '2025-11-06', '2025-11-05']).tolist()
+
+
+def test_lot_sans_date_valide():
+    with pytest.raises(ValueError):
+        rh.preparer_lot(lot(['pas une date']))
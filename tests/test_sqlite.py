@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Dépôt SQLite partagé : révision des données, caches d'agrégats et modèle entre workers."""
+import pandas as pd
+
+import interface_projet_filmod as rh
+
+COLONNE_DATE = "Sélectionnez la date de l'évaluation."
+
+
+def lot(notes, categorie='Maintenance', date='2025-06-01', ligne='ligne 1'):
+    return pd.DataFrame({
+        COLONNE_DATE: pd.Timestamp(date),
+        'Ligne designer': ligne,
+        'Etat du personnel': 'Collaborateur actif',
+        'Article': 'A',
+        'Polyvalence': '1 taches',
+        'Collaborateur': 'Adil',
+        'Compétence': 'Enfilage du fil',
+        'Note': notes,
+        'Categorie': categorie,
+    })
+
+
+def test_agregats_suivent_les_ajouts_d_un_autre_worker(tmp_path, monkeypatch):
+    chemin = str(tmp_path / 'rh.db')
+    depot = rh.DepotSQLite(chemin)
+    depot.remplir(lot([2.0, 4.0]), {'graine': 0})
+    monkeypatch.setattr(rh, 'DF_COMPLET', depot, raising=False)
+    monkeypatch.setattr(rh, 'CACHE_AGREGATS', rh.CacheLRU(8))
+    paquet = rh.PaquetModele(*[None] * 6, version=1, duree_entrainement=0, date_entrainement=None)
+
+    avant = rh.agregats_pour(paquet, ['Maintenance'], ['ligne 1'])[1]
+    revision = depot.revision()
+    # Autre worker : sa propre connexion, sans toucher au paquet ni aux caches de celui-ci
+    rh.DepotSQLite(chemin).ajouter(lot([6.0]))
+    apres = rh.agregats_pour(paquet, ['Maintenance'], ['ligne 1'])[1]
+
+    assert depot.revision() == revision + 1
+    assert avant['Maintenance'] == 3.0
+    assert apres['Maintenance'] == 4.0
+
+
+def test_modele_suit_les_lots_d_un_autre_worker(tmp_path, monkeypatch, evaluations):
+    monkeypatch.setitem(rh.CONFIG, 'ARTEFACTS_DIR', '')
+    monkeypatch.setitem(rh.CONFIG, 'PANEL', False)
+    for nom in ('DF_COMPLET', 'PAQUET', 'STATS_JOURNALIERES', 'CUBE', 'ALL_CATEGORIES', 'ALL_LIGNES'):
+        monkeypatch.setattr(rh, nom, None, raising=False)
+    monkeypatch.setattr(rh, 'CACHE_AGREGATS', rh.CacheLRU(8))
+    monkeypatch.setattr(rh, 'CACHE_GRAPHIQUES', rh.CacheLRU(8))
+    chemin = str(tmp_path / 'rh.db')
+    depot = rh.DepotSQLite(chemin)
+    depot.remplir(evaluations().assign(**{'Etat du personnel': 'Collaborateur actif', 'Article': 'A',
+                                          'Polyvalence': '1 taches', 'Compétence': 'Enfilage du fil'}),
+                  {'graine': 0})
+    rh.initialiser_etat(depot)
+    autre_worker = rh.DepotSQLite(chemin)
+
+    # Ré-entraînement : statistiques et dimensions relues dans la base
+    autre_worker.ajouter(lot([5.0, 5.0], categorie='Sécurité', date='2025-03-15', ligne='ligne 4'))
+    assert rh.reentrainer()
+    assert rh.PAQUET.df_historique[COLONNE_DATE].max() == pd.Timestamp('2025-03-15')
+    assert 'Sécurité' in rh.ALL_CATEGORIES and 'ligne 4' in rh.ALL_LIGNES
+
+    # Ingestion : le warm start part de la base, lots de l'autre worker compris
+    autre_worker.ajouter(lot([3.0], date='2025-03-16'))
+    rh.ingerer_evaluations(lot([1.0], date='2025-03-17'))
+    jours = pd.to_datetime(['2025-03-15', '2025-03-16', '2025-03-17'])
+    assert jours.isin(rh.STATS_JOURNALIERES.index).all()
+    assert jours.isin(rh.PAQUET.df_historique[COLONNE_DATE]).all()
+    pd.testing.assert_frame_equal(rh.STATS_JOURNALIERES, depot.statistiques_journalieres(), check_dtype=False)